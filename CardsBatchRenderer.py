@@ -0,0 +1,145 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+"""
+Génération d'un deck complet en ligne de commande, sans interface graphique.
+
+Exemple :
+    python CardsBatchRenderer.py deck.csv --params config/params.json --output generated
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+from utils.app_paths import FONT_DIR, GENERATE_DIR
+from utils.batch_renderer import (card_hashes, iter_deck_jpegs, load_base_params, load_deck, render_deck,
+                                  render_deck_parallel)
+from utils.build_manifest import BuildManifest
+from utils.card_renderer import default_card_params
+from utils.deck_file import DECK_SUFFIX, DeckFile
+from utils.disk_cache import disk_cache
+from utils.image_cache import image_cache
+from utils.layout_report import check_deck_to_report
+from utils.params_io import ParamsError, default_params_path
+from utils.printable_pdf_builder import PrintablePDFBuilder
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Génère les images de toutes les cartes d'un deck.")
+    parser.add_argument("deck", type=Path,
+                        help="Fichier de données (.json ou .csv) contenant les surcharges de chaque carte, "
+                             "ou projet .deck (modèle + cartes)")
+    parser.add_argument("--params", type=Path,
+                        help="Paramètres de base (.json, ou ancien params.pkl). "
+                             "Défaut : le modèle du .deck, sinon config/params.json")
+    parser.add_argument("--output", type=Path, default=GENERATE_DIR,
+                        help="Dossier de sortie des images. Défaut : generated/")
+    parser.add_argument("--quality", type=int, default=95, help="Qualité JPEG (1-95)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus de génération (0 = nombre de coeurs). Défaut : 1")
+    parser.add_argument("--image-cache-mb", type=int, default=256,
+                        help="Mémoire max du cache d'images sources, par processus (Mo). Défaut : 256")
+    parser.add_argument("--disk-cache-mb", type=int, default=1024,
+                        help="Taille max du cache disque des rendus, partagé avec l'IHM (Mo, 0 = désactivé). "
+                             "Défaut : 1024")
+    parser.add_argument("--disk-cache-dir", type=Path,
+                        help="Dossier du cache disque des rendus. Défaut : config/render_cache")
+    parser.add_argument("--fit", action="store_true",
+                        help="Ajuste la taille du texte de chaque carte à son cadre (text.fit_to_frame)")
+    parser.add_argument("--check", type=Path, metavar="RAPPORT",
+                        help="Vérifie seulement la mise en page (débordements du texte, titre sur le cadre photo) "
+                             "sans générer d'image, et écrit le rapport (.json ou .csv). "
+                             "Code de sortie 1 si une carte est en défaut")
+    parser.add_argument("--pdf", type=Path,
+                        help="Écrit directement un PDF imprimable des cartes (aucune image écrite dans --output)")
+    parser.add_argument("--card-width-mm", type=float, default=63,
+                        help="Largeur d'une carte dans le PDF (mm). Défaut : 63")
+    parser.add_argument("--margin-mm", type=float, default=10,
+                        help="Marge imprimante du PDF (mm). Défaut : 10")
+    parser.add_argument("--copies", type=int, default=1,
+                        help="Nombre d'exemplaires de chaque carte dans le PDF. Défaut : 1")
+    parser.add_argument("--dpi", type=int, default=300,
+                        help="Résolution d'impression du PDF : les cartes sont réduites à cette résolution "
+                             "(0 = taille originale). Défaut : 300")
+    parser.add_argument("--pack", action="store_true",
+                        help="PDF : cartes de tailles différentes placées par étagères (moins de pages). "
+                             "Le placement demande toutes les cartes : leurs JPEG encodés sont gardés en mémoire "
+                             "jusqu'à l'écriture du PDF")
+    parser.add_argument("--no-rotate", action="store_true",
+                        help="Avec --pack : interdit de tourner les cartes")
+    parser.add_argument("--force", action="store_true",
+                        help="Régénère toutes les cartes (et le PDF), même celles dont les entrées n'ont pas changé")
+    parser.add_argument("--to-deck", type=Path, metavar="DECK",
+                        help="Enregistre les paramètres de base et les cartes dans un projet .deck, sans rien générer")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    try:
+        if args.deck.suffix.lower() == DECK_SUFFIX:
+            deck = DeckFile(args.deck)
+            base_params = deck.template if args.params is None else load_base_params(args.params)
+            cards = list(deck)
+        else:
+            params_path = args.params or default_params_path()
+            if params_path.exists():
+                base_params = load_base_params(params_path)
+            else:
+                print(f"{params_path} introuvable, utilisation des paramètres par défaut")
+                base_params = default_card_params()
+            cards = load_deck(args.deck)
+    except ParamsError as e:
+        sys.exit(f"Paramètres invalides : {e}")
+
+    if args.to_deck:
+        DeckFile.create(args.to_deck, base_params, cards)
+        print(f"{len(cards)} cartes enregistrées dans {args.to_deck}")
+        return
+
+    if args.fit:
+        base_params["text"]["fit_to_frame"] = True
+
+    if args.check:
+        failed = check_deck_to_report(base_params, cards, args.check, font_dirs=[FONT_DIR])
+        sys.exit(1 if failed else 0)
+
+    # Génération incrémentale : seules les cartes dont les entrées ont changé sont régénérées. Le manifeste
+    # est rangé avec ce qui est produit : à côté du PDF avec --pdf (rien n'est écrit dans --output), sinon
+    # dans --output.
+    manifest = BuildManifest(args.pdf.parent if args.pdf else args.output)
+    if args.force:
+        manifest.reset()
+
+    image_cache_bytes = args.image_cache_mb * 2**20
+    disk_cache.configure(directory=args.disk_cache_dir, max_bytes=args.disk_cache_mb * 2**20)
+    if args.pdf:
+        # Comme --output : dossier créé avant le rendu, pas d'échec à l'écriture après tout le calcul
+        args.pdf.parent.mkdir(parents=True, exist_ok=True)
+        image_cache.set_max_bytes(image_cache_bytes)
+        builder = PrintablePDFBuilder(printer_margin_mm=args.margin_mm, photo_width_mm=args.card_width_mm,
+                                      jpeg_quality=args.quality, copies_per_card=args.copies,
+                                      target_dpi=args.dpi, layout="packed" if args.pack else "grid",
+                                      allow_rotation=not args.no_rotate)
+        jpegs = iter_deck_jpegs(base_params, cards, font_dirs=[FONT_DIR], quality=args.quality,
+                                workers=args.workers or None, image_cache_bytes=image_cache_bytes)
+        content_key = builder.content_key(card_hashes(manifest, base_params, cards, font_dirs=[FONT_DIR],
+                                                      quality=args.quality))
+        stats = manifest.write_pdf(builder, jpegs, args.pdf, content_key)
+        if stats["skipped"]:
+            print(f"{args.pdf} est à jour ({stats['cards']} cartes, aucune modification) : non régénéré")
+        else:
+            print(f"{stats['cards']} cartes sur {stats['pages']} pages dans {args.pdf} "
+                  f"({stats['bytes'] / 2**20:.1f} Mo) en {stats['elapsed']:.1f} s")
+    elif args.workers == 1:
+        image_cache.set_max_bytes(image_cache_bytes)
+        render_deck(base_params, cards, args.output, font_dirs=[FONT_DIR], quality=args.quality, manifest=manifest)
+    else:
+        render_deck_parallel(base_params, cards, args.output, font_dirs=[FONT_DIR], quality=args.quality,
+                             workers=args.workers or None, image_cache_bytes=image_cache_bytes, manifest=manifest)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,16 @@
 # Copyright (c) 2026 Le Gratiet Ronan
 # Licensed under the MIT License.
 
-import sys
-from pathlib import Path
-import pickle
+from utils.startup_timer import StartupTimer
+# Avant les imports lourds : le rapport de démarrage les compte
+startup_timer = StartupTimer()
+
+import os
+import threading
 import tkinter as tk
-from tkinter import ttk, filedialog
+from tkinter import ttk, filedialog, messagebox
 
-from utils.printable_pdf_builder import PrintablePDFBuilder
-from reportlab.lib.pagesizes import A4
-from PIL import Image, ImageTk
+from PIL import Image, ImageTk, ImageColor
 
 from custom_widgets.CardPreview import CardPreview
 from custom_widgets.spin_box_pair import SpinBoxPair
@@ -17,34 +18,20 @@ from custom_widgets.my_spin_box import MySpinBox
 from custom_widgets.color_picker import ColorPicker
 from custom_widgets.background_frame import BackgroundFrame
 from custom_widgets.image_file_picker import ImageFilePicker
+from utils.card_renderer import default_card_params
+from utils.font_cache import font_cache
+from utils.gradient import vertical_gradient
+from utils.app_paths import FONT_DIR, BACKGROUND_DIR, GENERATE_DIR, ORIGIN_PIC_DIR, PARAMS_FILE
+from utils import params_io
+from utils.batch_renderer import card_jpeg
+from utils.build_manifest import BuildManifest
+from utils.deck_file import DECK_SUFFIX, DeckFile, template_from_params
+from utils.params_io import ParamsError
 
 
-
-def get_exec_dir() -> Path:
-    if getattr(sys, 'frozen', False):
-        return Path(sys.executable).resolve().parent
-    else:
-        return Path(__file__).resolve().parent
-
-def get_assets_dir() -> Path:
-    if getattr(sys, 'frozen', False):
-        return Path(sys._MEIPASS) / "assets"
-    else:
-        return Path(__file__).resolve().parent / "assets"
-
-ROOT_DIR = get_exec_dir()
-FONT_DIR = get_assets_dir()
-BACKGROUND_DIR = FONT_DIR/"background_imgs"
-GENERATE_DIR = ROOT_DIR / "generated"
-CONFIG_DIR = ROOT_DIR / "config"   # dossier persistant utilisateur
-ORIGIN_PIC_DIR = ROOT_DIR / "origin_pics"
-
-for d in (CONFIG_DIR, GENERATE_DIR, ORIGIN_PIC_DIR):
-    d.mkdir(exist_ok=True)
-PARAMS_FILE = CONFIG_DIR / "params.pkl"
-
 class IHM_Gen_cards(tk.Tk):
     def __init__(self):
+        startup_timer.mark("imports")
         tk.Tk.__init__(self)
         self.grid_rowconfigure(0, weight=1)
         self.grid_columnconfigure(0, weight=1)
@@ -55,19 +42,11 @@ class IHM_Gen_cards(tk.Tk):
 
         self.style_definition()
 
-        # IMG Loading
-        image = Image.open(FONT_DIR/"directory.png")  # chemin de votre image
-        image = image.resize((30, 30), Image.LANCZOS)
-        photo_directory = ImageTk.PhotoImage(image)
-        image = Image.open(FONT_DIR/"color_palette.png")  # chemin de votre image
-        image = image.resize((30, 30), Image.LANCZOS)
-        photo_color_palette = ImageTk.PhotoImage(image)
-        image = Image.open(FONT_DIR / "save.png")  # chemin de votre image
-        image = image.resize((60, 60), Image.LANCZOS)
-        photo_save = ImageTk.PhotoImage(image)
+        # Icônes chargées à la première utilisation (voir _icon)
+        self._icons = {}
+        photo_save = self._icon("save.png", 60)
 
         self.available_fonts = self.list_fonts()
-        font_names = list(self.available_fonts.keys())
 
         # Main frames
         main_frame = ttk.Frame(self)
@@ -119,10 +98,11 @@ class IHM_Gen_cards(tk.Tk):
         self.gradient_canvas.bind("<Configure>", lambda e: self.draw_gradient())
 
         # --- CardPreview au-dessus du canvas ---
-        self.card_preview = CardPreview(frame_card_preview)
+        self.card_preview = CardPreview(frame_card_preview, on_image_shown=self._on_preview_shown)
         self.card_preview.grid(row=0, column=0, sticky='nsew')
         self.card_preview.tkraise()
 
+        # Onglets construits à leur première sélection : seul l'onglet affiché l'est au démarrage
         tabControl = ttk.Notebook(frame_card_params)
         frame_card_params.add_widget(tabControl)
         tab_carte = ttk.Frame(tabControl, style='notebook_label.TFrame')
@@ -131,6 +111,7 @@ class IHM_Gen_cards(tk.Tk):
         tab_image = ttk.Frame(tabControl, style='notebook_label.TFrame')
         self.tab_text = ttk.Frame(tabControl, style='notebook_label.TFrame')
         tab_pdf = ttk.Frame(tabControl, style='notebook_label.TFrame')
+        tab_deck = ttk.Frame(tabControl, style='notebook_label.TFrame')
 
         self.tab_text.grid_rowconfigure(0, weight=0)
         self.tab_text.grid_columnconfigure(0, weight=1)
@@ -140,7 +121,21 @@ class IHM_Gen_cards(tk.Tk):
         tabControl.add(tab_image, text='Image')
         tabControl.add(self.tab_text, text='Texte')
         tabControl.add(tab_pdf, text='PDF')
-        tabControl.bind("<<NotebookTabChanged>>", self.resize_notebook)
+        tabControl.add(tab_deck, text='Deck')
+        self.tab_control = tabControl
+        # Onglets dont les widgets affichent self.params : reconstruits après l'ouverture d'une carte du deck
+        self._param_tab_builders = {
+            str(tab_carte): self._build_general_tab,
+            str(tab_background): self._build_background_tab,
+            str(tab_titre): self._build_title_tab,
+            str(tab_image): self._build_image_tab,
+            str(self.tab_text): self._build_text_tab,
+        }
+        # Onglets pas encore construits
+        self._tab_builders = dict(self._param_tab_builders)
+        self._tab_builders[str(tab_pdf)] = self._build_pdf_tab
+        self._tab_builders[str(tab_deck)] = self._build_deck_tab
+        tabControl.bind("<<NotebookTabChanged>>", self._on_tab_changed)
 
         # =========================
         # DEFAULT PARAMS
@@ -148,51 +143,7 @@ class IHM_Gen_cards(tk.Tk):
         self.params = {}
         load_ok = self.load_params()
         if not load_ok:
-            self.params.setdefault("frame_dimensions", (1260, 1760))
-            self.params.setdefault("card_bg_color", "green")
-            self.params.setdefault("card_outline_color", "black")
-            self.params.setdefault("card_outline_width", 10)
-
-            self.params.setdefault("title", {
-                "text": "",
-                "font_size": 68,
-                "color": "white",
-                "title_position": (30, 10),
-                "text_outline_color": "black"
-            })
-
-            self.params.setdefault("background", {
-                "background_path": None,
-                "display_background": False})
-            self.params.setdefault("photo", {
-                "frame_dimensions": (1200, 750),
-                "frame_position": (30, 100),
-                "frame_bg_color": "#EFD5B2",
-                "background_opacity": 70,
-                "frame_rounded_radius": 40,
-                "frame_outline_color": "black",
-                "frame_outline_width": 10,
-                "photo_path": ""
-            })
-
-            self.params.setdefault("text", {
-                "frame_dimensions": (1200, 850),
-                "frame_position": (30, 870),
-                "font_size_regular": 60,
-                "font_size_bold": 60,
-                "font_size_italic": 44,
-                "text_color": "black",
-                "frame_rounded_radius": 40,
-                "padding": 60,
-                "frame_outline_color": "black",
-                "frame_outline_width": 10,
-                "font_regular": "Lato-Regular.ttf",
-                "font_bold": "Lato-Black.ttf",
-                "font_italic": "Lato-Italic.ttf",
-                "frame_bg_color": "#b4b4b4",
-                "background_opacity": 70,
-                "text_element": []
-            })
+            self.params = default_card_params()
 
         # =========================
         # PDF CREATION PARAMS
@@ -201,12 +152,62 @@ class IHM_Gen_cards(tk.Tk):
             "image_dir": str(GENERATE_DIR),
             "page_size": "A4",
             "printer_margin_mm": 10,
-            "photo_width_mm": 63
+            "photo_width_mm": 63,
+            "copies_per_card": 1,
+            "target_dpi": 300,
+            "jpeg_quality": 90,
+            "layout": "grid",
+            "allow_rotation": True
         }
 
-        # =========================
-        # GENERAL tab
-        # =========================
+        self.deck = None
+        self.deck_path_var = tk.StringVar(value="")
+        self.deck_info_var = tk.StringVar(value="Aucun deck ouvert")
+        self.deck_number_var = tk.IntVar(value=1)
+
+        self._build_tab(tabControl.select())
+        self.refresh_preview()
+        startup_timer.mark("fenêtre construite")
+        self.after_idle(self._on_first_frame)
+
+    def _on_first_frame(self):
+        self.update_idletasks()
+        startup_timer.mark("première image interactive")
+        # Polices préchargées en tâche de fond, une fois la fenêtre utilisable
+        threading.Thread(target=self.warm_font_cache, daemon=True).start()
+
+    def _on_preview_shown(self, draft):
+        if draft:
+            startup_timer.mark("aperçu brouillon")
+            return
+        startup_timer.mark("aperçu")
+        self.card_preview.on_image_shown = None
+        # Rapport sur demande seulement : CARD_CREATOR_STARTUP_REPORT=1 python CardsGenerator.py
+        if os.environ.get("CARD_CREATOR_STARTUP_REPORT"):
+            print(startup_timer.report())
+
+    def _icon(self, name: str, size: int):
+        """Icône de FONT_DIR redimensionnée à size x size, chargée une seule fois."""
+        key = (name, size)
+        if key not in self._icons:
+            image = Image.open(FONT_DIR / name).resize((size, size), Image.LANCZOS)
+            self._icons[key] = ImageTk.PhotoImage(image)
+        return self._icons[key]
+
+    # =========================
+    # Onglets
+    # =========================
+    def _on_tab_changed(self, event):
+        self._build_tab(event.widget.select())
+        self.resize_notebook(event)
+
+    def _build_tab(self, tab_name):
+        builder = self._tab_builders.pop(str(tab_name), None)
+        if builder is not None:
+            builder(self.nametowidget(tab_name))
+
+    def _build_general_tab(self, tab_carte):
+        photo_color_palette = self._icon("color_palette.png", 30)
         row = 0
 
         ttk.Label(tab_carte, text="Dimensions de la carte (pixel) : ").grid(row=row, column=0, sticky="w",
@@ -241,19 +242,22 @@ class IHM_Gen_cards(tk.Tk):
                   from_=0, to=300, width=6).grid(row=row, column=1, sticky="w", padx=(15, 10), pady=10)
         row += 1
 
-        # =========================
-        # BACKGROUND tab
-        # =========================
+        ttk.Label(tab_carte, text="Délai de rafraîchissement (ms) : ").grid(row=row, column=0, sticky="w",
+                                                                         padx=(10, 5), pady=5)
+        MySpinBox(tab_carte, callback=self.card_preview.set_refresh_delay,
+                  init_value=self.card_preview.refresh_delay_ms,
+                  from_=0, to=1000, increment=10, width=6).grid(row=row, column=1, sticky="w", padx=(15, 10), pady=10)
+        row += 1
+
+    def _build_background_tab(self, tab_background):
         def background_changed(new_config):
             print("Background mis à jour :", new_config)
         ImageFilePicker(tab_background, self._get_list_predifined_background(), self.params["background"],
-                        on_change_callback=lambda v: {self.params["background"].update(frame_dimensions=v),
-                                                      self.refresh_preview()}).grid(row=0, column=0, sticky="w",
-                                                                                    padx=(10, 5), pady=5)
+                        on_change_callback=lambda v: self.refresh_preview()).grid(row=0, column=0, sticky="w",
+                                                                                  padx=(10, 5), pady=5)
 
-        # =========================
-        # TITLE tab
-        # =========================
+    def _build_title_tab(self, tab_titre):
+        photo_color_palette = self._icon("color_palette.png", 30)
         row = 0
         title = self.params["title"]
 
@@ -290,9 +294,9 @@ class IHM_Gen_cards(tk.Tk):
                     label_spinbox_2="Y :",
                     label_inter_spinbox=" - ").grid(row=row, column=1, sticky="w", padx=(10, 5), pady=5)
 
-        # =========================
-        # PICTURE tab
-        # =========================
+    def _build_image_tab(self, tab_image):
+        photo_color_palette = self._icon("color_palette.png", 30)
+        photo_directory = self._icon("directory.png", 30)
         photo = self.params["photo"]
         row = 0
 
@@ -371,13 +375,12 @@ class IHM_Gen_cards(tk.Tk):
         ))
         frame_path_image.grid(row=row, column=1, sticky="w", padx=(15, 10), pady=10)
 
-
-        # =========================
-        # TEXT tab
-        # =========================
+    def _build_text_tab(self, tab_text):
+        photo_color_palette = self._icon("color_palette.png", 30)
+        font_names = list(self.available_fonts.keys())
         text_conf = self.params["text"]
 
-        text_options_frame = ttk.Frame(self.tab_text)
+        text_options_frame = ttk.Frame(tab_text)
         text_options_frame.grid(row=0, column=0, sticky="ew", padx=10, pady=10)
         text_options_frame.grid_columnconfigure(1, weight=1)
 
@@ -560,14 +563,28 @@ class IHM_Gen_cards(tk.Tk):
         font_italic_frame.grid(row=row, column=1, sticky="w", padx=(10, 5), pady=5)
         row += 1
 
-        blocks_frame = ttk.Frame(self.tab_text)
+        # Les tailles de police ci-dessus ne donnent alors que les proportions entre les trois polices
+        ttk.Label(text_options_frame, text="Ajuster au cadre :").grid(row=row, column=0, sticky="w", padx=(10, 5),
+                                                                      pady=5)
+        fit_var = tk.BooleanVar(value=text_conf.get("fit_to_frame", False))
+        ttk.Checkbutton(text_options_frame, variable=fit_var) \
+            .grid(row=row, column=1, sticky="w", padx=(15, 10), pady=5)
+        fit_var.trace_add("write",
+                          lambda *_: (
+                              text_conf.update(fit_to_frame=fit_var.get()),
+                              self.refresh_preview()
+                          )
+                          )
+        row += 1
+
+        blocks_frame = ttk.Frame(tab_text)
         blocks_frame.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
         blocks_frame.grid_rowconfigure(0, weight=0)  # bouton
         blocks_frame.grid_rowconfigure(1, weight=1)  # zone scrollable
 
         blocks_frame.grid_columnconfigure(0, weight=1)  # canvas prend tout
         blocks_frame.grid_columnconfigure(1, weight=0)  # scrollbar fixe
-        self.tab_text.grid_rowconfigure(1, weight=1)
+        tab_text.grid_rowconfigure(1, weight=1)
 
         canvas = tk.Canvas(blocks_frame, highlightthickness=0)
         canvas.grid(row=1, column=0, sticky="nsew")
@@ -639,6 +656,24 @@ class IHM_Gen_cards(tk.Tk):
 
         redraw_elements()
 
+    def _rebuild_param_tabs(self):
+        """
+        Une carte du deck peut différer du modèle sur n'importe quelle clé (couleurs, dimensions, polices...) :
+        les onglets de paramètres déjà construits sont vidés, puis reconstruits depuis self.params à leur
+        prochaine sélection (tout de suite pour l'onglet affiché). Sans cela, un widget resté sur l'ancienne
+        valeur la réécrirait dans self.params à la première modification.
+        """
+        for tab_name, builder in self._param_tab_builders.items():
+            if tab_name not in self._tab_builders:
+                for child in self.nametowidget(tab_name).winfo_children():
+                    child.destroy()
+                self._tab_builders[tab_name] = builder
+        self._build_tab(self.tab_control.select())
+
+    def _build_pdf_tab(self, tab_pdf):
+        photo_directory = self._icon("directory.png", 30)
+        row = 0
+
         ttk.Label(tab_pdf, text="Dossier images :").grid(row=row, column=0, sticky="w", padx=5, pady=5)
         img_dir_var = tk.StringVar(value=self.pdf_conf["image_dir"])
         frame_select = ttk.Frame(tab_pdf)
@@ -669,14 +704,52 @@ class IHM_Gen_cards(tk.Tk):
                   init_value=self.pdf_conf["photo_width_mm"],
                   from_=1, to=300, width=5).grid(row=row, column=1, sticky="w", padx=(15, 10), pady=10)
 
+        row += 1
+        ttk.Label(tab_pdf, text="Exemplaires par carte :").grid(row=row, column=0, sticky="w", padx=(10, 5), pady=5)
+        MySpinBox(tab_pdf,
+                  callback=lambda v: self.pdf_conf.update(copies_per_card=v),
+                  init_value=self.pdf_conf["copies_per_card"],
+                  from_=1, to=100, width=5).grid(row=row, column=1, sticky="w", padx=(15, 10), pady=10)
+
+        row += 1
+        ttk.Label(tab_pdf, text="Résolution d'impression (dpi, 0 = originale) :").grid(row=row, column=0, sticky="w",
+                                                                                   padx=(10, 5), pady=5)
+        MySpinBox(tab_pdf,
+                  callback=lambda v: self.pdf_conf.update(target_dpi=v),
+                  init_value=self.pdf_conf["target_dpi"],
+                  from_=0, to=1200, width=5).grid(row=row, column=1, sticky="w", padx=(15, 10), pady=10)
+
+        row += 1
+        ttk.Label(tab_pdf, text="Qualité JPEG :").grid(row=row, column=0, sticky="w", padx=(10, 5), pady=5)
+        MySpinBox(tab_pdf,
+                  callback=lambda v: self.pdf_conf.update(jpeg_quality=v),
+                  init_value=self.pdf_conf["jpeg_quality"],
+                  from_=1, to=95, width=5).grid(row=row, column=1, sticky="w", padx=(15, 10), pady=10)
+
         row += 1
 
         ttk.Label(tab_pdf, text="La hauteur de la photo est calculée pour conserver le bon ratio "
                                 "w*h.").grid(row=row, column=0, sticky="w", padx=5, pady=5, columnspan=2)
         row += 1
 
-        ttk.Label(tab_pdf, text="Attention: Toutes les cartes du dossier doivent avoir la même dimension en "
-                                "pixel").grid(row=row, column=0, sticky="w", padx=5, pady=5, columnspan=2)
+        ttk.Label(tab_pdf, text="Attention: en grille, toutes les cartes du dossier doivent avoir la même dimension "
+                                "en pixel").grid(row=row, column=0, sticky="w", padx=5, pady=5, columnspan=2)
+        row += 1
+
+        # Placement optimisé : tailles en mm proportionnelles aux tailles en pixels (échelle de la première carte)
+        ttk.Label(tab_pdf, text="Cartes de tailles différentes :").grid(row=row, column=0, sticky="w", padx=(10, 5),
+                                                                        pady=5)
+        packed_var = tk.BooleanVar(value=self.pdf_conf["layout"] == "packed")
+        ttk.Checkbutton(tab_pdf, variable=packed_var).grid(row=row, column=1, sticky="w", padx=(15, 10), pady=5)
+        packed_var.trace_add("write",
+                             lambda *_: self.pdf_conf.update(layout="packed" if packed_var.get() else "grid"))
+        row += 1
+
+        ttk.Label(tab_pdf, text="Rotation des cartes autorisée :").grid(row=row, column=0, sticky="w", padx=(10, 5),
+                                                                        pady=5)
+        rotation_var = tk.BooleanVar(value=self.pdf_conf["allow_rotation"])
+        ttk.Checkbutton(tab_pdf, variable=rotation_var).grid(row=row, column=1, sticky="w", padx=(15, 10), pady=5)
+        rotation_var.trace_add("write", lambda *_: self.pdf_conf.update(allow_rotation=rotation_var.get()))
         row += 1
 
         button_save_jpg = ttk.Button(tab_pdf, text='Créer un pdf contenant plusieurs cartes',
@@ -685,7 +758,36 @@ class IHM_Gen_cards(tk.Tk):
         button_save_jpg.grid(row=row, column=0, columnspan=3, padx=10, pady=10)
         button_save_jpg.grid_configure(sticky="")  # ou sticky="n" pour juste vertical
 
-        self.refresh_preview()
+    def _build_deck_tab(self, tab_deck):
+        photo_directory = self._icon("directory.png", 30)
+        row = 0
+
+        ttk.Label(tab_deck, text="Fichier deck :").grid(row=row, column=0, sticky="w", padx=(10, 5), pady=5)
+        frame_deck = ttk.Frame(tab_deck)
+        frame_deck.grid(row=row, column=1, sticky="w", padx=5, pady=5)
+        ttk.Entry(frame_deck, textvariable=self.deck_path_var, width=35, state="readonly").grid(row=0, column=0)
+        btn = tk.Button(frame_deck, image=photo_directory, command=self.open_deck)
+        btn.image = photo_directory
+        btn.grid(row=0, column=1)
+        row += 1
+
+        ttk.Label(tab_deck, textvariable=self.deck_info_var).grid(row=row, column=0, columnspan=2, sticky="w",
+                                                                  padx=(10, 5), pady=5)
+        row += 1
+
+        ttk.Label(tab_deck, text="Carte n° :").grid(row=row, column=0, sticky="w", padx=(10, 5), pady=5)
+        self.deck_spinbox = ttk.Spinbox(tab_deck, textvariable=self.deck_number_var, from_=1, to=1, width=7)
+        self.deck_spinbox.grid(row=row, column=1, sticky="w", padx=(15, 10), pady=10)
+        row += 1
+
+        for text, command in (("Nouveau deck (modèle = paramètres actuels)", self.new_deck),
+                              ("Ouvrir la carte", self.open_deck_card),
+                              ("Enregistrer la carte", self.save_deck_card),
+                              ("Ajouter comme nouvelle carte", self.append_deck_card),
+                              ("Remplacer le modèle du deck par les paramètres actuels", self.save_deck_template)):
+            ttk.Button(tab_deck, text=text, command=command).grid(row=row, column=0, columnspan=2, sticky="w",
+                                                                  padx=10, pady=5)
+            row += 1
 
 
     def style_definition(self):
@@ -719,31 +821,41 @@ class IHM_Gen_cards(tk.Tk):
         style.configure('TNotebook.Tab', padding=[20, 10], font=('Segoe UI', 10))
 
     def save_to_jpg(self):
-        img = self.card_preview.create_card_image(self.params)
+        # Même cache disque que les exports : une carte déjà générée n'est pas recalculée
+        data = card_jpeg(self.card_preview.export_renderer, self.params, 95)
         path = filedialog.asksaveasfilename(
             title="Sauvegarder la carte sous...",
             defaultextension=".jpg",
             filetypes=[("JPEG", "*.jpg")],
             initialdir=GENERATE_DIR,
-            initialfile=f"Carte {self.params["title"]["text"]}.jpg"
+            initialfile=f"Carte {self.params['title']['text']}.jpg"
         )
         if path:
-            img.convert("RGB").save(path, "JPEG", quality=95)
+            with open(path, "wb") as f:
+                f.write(data)
 
     def refresh_preview(self):
         self.card_preview.update_params(self.params, refresh_preview=True)
 
 
     def save_params(self):
-        with open(PARAMS_FILE, "wb") as f:
-            pickle.dump(self.params, f)
+        params_io.save_params(self.params, PARAMS_FILE)
 
     def load_params(self):
-        if PARAMS_FILE.exists():
-            with open(PARAMS_FILE, "rb") as f:
-                self.params = pickle.load(f)
-            return True
-        return False
+        """
+        Recharge config/params.json ; un ancien config/params.pkl est migré et réécrit en JSON.
+        """
+        path = params_io.default_params_path()
+        if not path.exists():
+            return False
+        try:
+            self.params = params_io.load_params(path)
+        except ParamsError as e:
+            print(f"Paramètres ignorés : {e}")
+            return False
+        if path != PARAMS_FILE:
+            self.save_params()
+        return True
 
     def list_fonts(self) -> dict:
         """
@@ -752,16 +864,140 @@ class IHM_Gen_cards(tk.Tk):
         font_files = list(FONT_DIR.glob("*.ttf")) + list(FONT_DIR.glob("*.otf"))
         return {f.stem: f for f in font_files}
 
+    def warm_font_cache(self):
+        """
+        Précharge toutes les polices de FONT_DIR, et instancie celles utilisées par la carte courante
+        aux tailles courantes, pour qu'un changement de police ne relise pas les fichiers .ttf.
+        Lancé dans un thread après le premier affichage (font_cache est partagé avec le thread de rendu).
+        """
+        font_cache.preload(self.available_fonts.values())
+        text_conf = self.params["text"]
+        font_cache.warm([
+            (FONT_DIR / "DejaVuSans.ttf", self.params["title"]["font_size"]),
+            (FONT_DIR / text_conf["font_regular"], text_conf["font_size_regular"]),
+            (FONT_DIR / text_conf["font_bold"], text_conf["font_size_bold"]),
+            (FONT_DIR / text_conf["font_italic"], text_conf["font_size_italic"]),
+        ])
+
     def create_pdf(self):
+        # ReportLab n'est importé qu'à la première création de PDF (c'est l'import le plus lent de l'IHM)
+        from reportlab.lib.pagesizes import A4
+        from utils.printable_pdf_builder import PrintablePDFBuilder
+
         page_size = A4 if self.pdf_conf["page_size"] == "A4" else None
 
         builder = PrintablePDFBuilder(
             image_dir=self.pdf_conf["image_dir"],
             page_size=page_size,
             printer_margin_mm=self.pdf_conf["printer_margin_mm"],
-            photo_width_mm=self.pdf_conf["photo_width_mm"]
+            photo_width_mm=self.pdf_conf["photo_width_mm"],
+            copies_per_card=self.pdf_conf["copies_per_card"],
+            target_dpi=self.pdf_conf["target_dpi"],
+            jpeg_quality=self.pdf_conf["jpeg_quality"],
+            layout=self.pdf_conf["layout"],
+            allow_rotation=self.pdf_conf["allow_rotation"]
+        )
+        save_path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF", "*.pdf")]
         )
-        builder.generate_pdf()
+        if not save_path:
+            return
+
+        # Le PDF n'est pas réécrit si ni les images du dossier ni les réglages n'ont changé
+        manifest = BuildManifest(self.pdf_conf["image_dir"])
+        stats = manifest.write_pdf(builder, builder.images, save_path, builder.content_key())
+        if stats["skipped"]:
+            messagebox.showinfo("PDF à jour", f"{save_path} est déjà à jour ({stats['cards']} cartes).")
+            return
+        messagebox.showinfo("PDF créé",
+                            f"{stats['cards']} cartes sur {stats['pages']} pages "
+                            f"({stats['bytes'] / 2**20:.1f} Mo, {stats['elapsed']:.1f} s)")
+
+    # =========================
+    # Deck
+    # =========================
+    def open_deck(self):
+        path = filedialog.askopenfilename(filetypes=[("Deck", "*" + DECK_SUFFIX)], initialdir=GENERATE_DIR)
+        if path:
+            self._set_deck(DeckFile(path))
+
+    def new_deck(self):
+        path = filedialog.asksaveasfilename(defaultextension=DECK_SUFFIX, filetypes=[("Deck", "*" + DECK_SUFFIX)],
+                                            initialdir=GENERATE_DIR)
+        if path:
+            self._set_deck(DeckFile.create(path, template_from_params(self.params)))
+
+    def _set_deck(self, deck):
+        try:
+            deck.template
+            len(deck)
+        except (OSError, ParamsError) as e:
+            messagebox.showerror("Deck", str(e))
+            return
+        self.deck = deck
+        self.deck_path_var.set(str(deck.path))
+        self._update_deck_info()
+
+    def _update_deck_info(self):
+        count = len(self.deck)
+        self.deck_spinbox.configure(to=max(count, 1))
+        self.deck_info_var.set(f"{count} cartes")
+
+    def _deck_index(self):
+        """Numéro de carte saisi (à partir de 0), ou None après avoir prévenu l'utilisateur."""
+        if self.deck is None:
+            messagebox.showinfo("Deck", "Ouvrez ou créez d'abord un deck.")
+            return None
+        try:
+            number = self.deck_number_var.get()
+        except tk.TclError:
+            number = 0
+        if not 1 <= number <= len(self.deck):
+            messagebox.showerror("Deck", f"Numéro de carte entre 1 et {len(self.deck)} attendu.")
+            return None
+        return number - 1
+
+    @staticmethod
+    def _update_in_place(target: dict, source: dict):
+        # Les widgets gardent une référence vers les sous-dictionnaires de self.params
+        for key, value in source.items():
+            if isinstance(value, dict) and isinstance(target.get(key), dict):
+                IHM_Gen_cards._update_in_place(target[key], value)
+            else:
+                target[key] = value
+
+    def open_deck_card(self):
+        index = self._deck_index()
+        if index is None:
+            return
+        try:
+            params = self.deck.card_params(index)
+        except ParamsError as e:
+            messagebox.showerror("Deck", str(e))
+            return
+        self._update_in_place(self.params, params)
+        self._rebuild_param_tabs()
+        self.refresh_preview()
+
+    def save_deck_card(self):
+        index = self._deck_index()
+        if index is not None:
+            self.deck.replace(index, self.params)
+
+    def append_deck_card(self):
+        if self.deck is None:
+            messagebox.showinfo("Deck", "Ouvrez ou créez d'abord un deck.")
+            return
+        index = self.deck.append(self.params)
+        self._update_deck_info()
+        self.deck_number_var.set(index + 1)
+
+    def save_deck_template(self):
+        if self.deck is None:
+            messagebox.showinfo("Deck", "Ouvrez ou créez d'abord un deck.")
+            return
+        self.deck.set_template(template_from_params(self.params))
 
     def resize_notebook(self, event):
         notebook = event.widget
@@ -788,7 +1024,6 @@ class IHM_Gen_cards(tk.Tk):
 
     def draw_gradient(self):
         canvas = self.gradient_canvas
-        canvas.delete("gradient")
 
         height = canvas.winfo_height()
         width = canvas.winfo_width()
@@ -798,18 +1033,11 @@ class IHM_Gen_cards(tk.Tk):
         color1 = "#ffffff"
         color2 = "#000000"
 
-        r1, g1, b1 = canvas.winfo_rgb(color1)
-        r2, g2, b2 = canvas.winfo_rgb(color2)
-
-        r_ratio = (r2 - r1) / height
-        g_ratio = (g2 - g1) / height
-        b_ratio = (b2 - b1) / height
-
-        for i in range(height):
-            nr = int(r1 + r_ratio * i) // 256
-            ng = int(g1 + g_ratio * i) // 256
-            nb = int(b1 + b_ratio * i) // 256
-            canvas.create_line(0, i, width, i, fill=f"#{nr:02x}{ng:02x}{nb:02x}", tags="gradient")
+        # Une seule image au lieu d'une ligne de canvas par pixel de hauteur
+        gradient = vertical_gradient(width, height, ImageColor.getrgb(color1), ImageColor.getrgb(color2))
+        self.gradient_tk_image = ImageTk.PhotoImage(gradient)
+        canvas.delete("gradient")
+        canvas.create_image(0, 0, anchor="nw", image=self.gradient_tk_image, tags="gradient")
 
     def _get_list_predifined_background(self):
         image_exts = {".png", ".jpg", ".jpeg", ".webp", ".bmp"}
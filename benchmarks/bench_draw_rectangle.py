@@ -0,0 +1,92 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+"""
+Micro-benchmark de CardRenderer._draw_rectangle : bordure de carte, cadre photo et cadre texte
+d'une carte 1260x1760, comparés à l'ancienne version (calque RGBA de la taille de la carte).
+
+    python benchmarks/bench_draw_rectangle.py
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from PIL import Image, ImageChops, ImageColor, ImageDraw
+
+from utils.card_renderer import CardRenderer, default_card_params
+
+
+def draw_rectangle_full_overlay(img, position, dimensions, color, round_radius=0, outline_color="black",
+                                outline_width=0, opacity=100):
+    """Ancienne implémentation : calque de la taille de la carte, fusionné en entier."""
+    x0, y0 = position
+    w, h = dimensions
+    opacity = int((opacity)*255/100)
+
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+
+    overlay = Image.new("RGBA", img.size, (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
+
+    if color is None:
+        fill_color = None
+    else:
+        r, g, b = ImageColor.getrgb(color)
+        fill_color = (r, g, b, opacity)
+
+    if not outline_width:
+        draw.rounded_rectangle([x0, y0, x0 + w, y0 + h], round_radius, fill=fill_color)
+    else:
+        draw.rounded_rectangle([x0, y0, x0 + w, y0 + h], round_radius, fill=fill_color,
+                               outline=outline_color, width=outline_width)
+
+    img.alpha_composite(overlay)
+    return img
+
+
+def card_shapes(params):
+    """Les trois rectangles dessinés à chaque rendu, avec les paramètres par défaut."""
+    photo, text = params["photo"], params["text"]
+    return [
+        ((0, 0), params["frame_dimensions"], None, 0, params["card_outline_color"], params["card_outline_width"], 100),
+        (photo["frame_position"], photo["frame_dimensions"], photo["frame_bg_color"], photo["frame_rounded_radius"],
+         photo["frame_outline_color"], photo["frame_outline_width"], photo["background_opacity"]),
+        (text["frame_position"], text["frame_dimensions"], text["frame_bg_color"], text["frame_rounded_radius"],
+         text["frame_outline_color"], text["frame_outline_width"], text["background_opacity"]),
+    ]
+
+
+def main():
+    params = default_card_params()
+    renderer = CardRenderer()
+    shapes = card_shapes(params)
+
+    def render_old():
+        img = Image.new("RGB", params["frame_dimensions"], params["card_bg_color"])
+        for shape in shapes:
+            img = draw_rectangle_full_overlay(img, *shape)
+        return img
+
+    def render_new():
+        img = Image.new("RGBA", params["frame_dimensions"], params["card_bg_color"])
+        for shape in shapes:
+            img = renderer._draw_rectangle(img, *shape)
+        return img
+
+    diff = ImageChops.difference(render_old(), render_new()).getbbox()
+    print("Résultats identiques :", diff is None)
+
+    number = 20
+    old = min(timeit.repeat(render_old, number=number, repeat=3)) / number
+    new = min(timeit.repeat(render_new, number=number, repeat=3)) / number
+    print(f"Calque pleine carte : {old * 1000:7.2f} ms / rendu")
+    print(f"Zone du rectangle   : {new * 1000:7.2f} ms / rendu")
+    print(f"Gain                : {(old - new) * 1000:7.2f} ms / rendu (x{old / new:.1f})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+"""
+Taille et temps d'écriture du PDF imprimable selon la résolution cible et la qualité JPEG,
+pour un deck de cartes 1260x1760 placées sur 63 mm de large (environ 500 dpi).
+Sans résolution cible les JPEG sont intégrés tels quels ; sinon ils sont décodés, réduits et ré-encodés.
+
+    python benchmarks/bench_pdf_export.py [nombre de cartes]
+"""
+
+import io
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.app_paths import FONT_DIR
+from utils.batch_renderer import iter_deck_jpegs
+from utils.card_renderer import default_card_params
+from utils.disk_cache import disk_cache
+from utils.printable_pdf_builder import PrintablePDFBuilder
+
+
+# (résolution cible, qualité JPEG) ; la première configuration sert de référence
+CONFIGS = [(None, 95), (300, 95), (300, 90), (300, 85), (200, 85)]
+
+
+def deck(count: int) -> list[dict]:
+    return [{"title": {"text": f"Carte {i}"},
+             "text": {"text_element": [{"title": "Effet : ", "texte": f"carte numéro {i} " * 12, "comment": ""}]}}
+            for i in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 18
+    # Cache disque désactivé : les cartes sont vraiment rendues, et le cache de l'utilisateur n'est pas rempli
+    disk_cache.configure(max_bytes=0)
+    print(f"Génération de {count} cartes...")
+    cards = list(iter_deck_jpegs(default_card_params(), deck(count), font_dirs=[FONT_DIR]))
+
+    reference = None
+    for dpi, quality in CONFIGS:
+        builder = PrintablePDFBuilder(photo_width_mm=63, target_dpi=dpi, jpeg_quality=quality)
+        stats = builder.write_pdf(cards, io.BytesIO())
+        reference = reference or stats
+        label = f"{dpi} dpi" if dpi else "originale"
+        print(f"{label:>9}, qualité {quality} : {stats['bytes'] / 2**20:6.1f} Mo ({stats['bytes'] / reference['bytes']:4.0%}), "
+              f"écrit en {stats['elapsed']:5.2f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,13 +9,24 @@ class BackgroundFrame(ttk.Frame):
         self.canvas = tk.Canvas(self, highlightthickness=0)
         self.canvas.pack(fill="both", expand=True)
 
-        self.original_image = Image.open(image_path)
+        # Image décodée au premier dessin, une fois la fenêtre affichée (et non à sa construction)
+        self.image_path = image_path
+        self._original_image = None
         self.tk_image = None
         self.image_id = None
         self.window_id = None
+        self._size = None
+        self._resize_job = None
 
         self.canvas.bind("<Configure>", self._resize)
 
+    @property
+    def original_image(self):
+        if self._original_image is None:
+            self._original_image = Image.open(self.image_path)
+            self._original_image.load()
+        return self._original_image
+
     def _update_canvas_size(self, event):
         req_w = event.width
         req_h = event.height
@@ -31,7 +42,14 @@ class BackgroundFrame(ttk.Frame):
         widget.bind("<Configure>", self._update_canvas_size)
 
     def _resize(self, event):
-        w, h = event.width, event.height
+        # Un seul recadrage par rafale de <Configure>, quand Tk n'a plus rien à afficher
+        self._size = (event.width, event.height)
+        if self._resize_job is None:
+            self._resize_job = self.after_idle(self._draw)
+
+    def _draw(self):
+        self._resize_job = None
+        w, h = self._size
         img_w, img_h = self.original_image.size
 
         left = max((img_w - w) // 2, 0)
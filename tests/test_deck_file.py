@@ -0,0 +1,136 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+"""Format .deck / .deck.idx : lecture par numéro, modifications et reconstruction de l'index."""
+
+import json
+
+import pytest
+
+from utils.card_renderer import default_card_params
+from utils.deck_file import DeckFile, card_delta, template_from_params
+from utils.params_io import ParamsError
+
+
+def make_template():
+    params = default_card_params()
+    params["card_bg_color"] = "#102030"
+    params["title"]["font_size"] = 42
+    return template_from_params(params)
+
+
+def card(title, **overrides):
+    return dict({"title": {"text": title}}, **overrides)
+
+
+@pytest.fixture
+def deck(tmp_path):
+    return DeckFile.create(tmp_path / "monstres.deck", make_template(),
+                           [card("Dragon"), card("Elfe", card_bg_color="red"), card("Troll")])
+
+
+def titles(deck):
+    return [deck.card_params(i)["title"]["text"] for i in range(len(deck))]
+
+
+def test_create_and_read(deck):
+    assert len(deck) == 3
+    assert deck.index_path.exists()
+    assert titles(deck) == ["Dragon", "Elfe", "Troll"]
+    assert deck.card(1) == {"title": {"text": "Elfe"}, "card_bg_color": "red"}
+    assert deck.card(-1) == {"title": {"text": "Troll"}}
+
+    params = deck.card_params(0)
+    assert params["card_bg_color"] == "#102030"
+    assert params["title"]["font_size"] == 42
+    assert isinstance(params["frame_dimensions"], tuple)
+
+    with pytest.raises(IndexError):
+        deck.card(3)
+    with pytest.raises(IndexError):
+        deck.card(-4)
+
+
+def test_lines_are_compact_deltas(deck):
+    lines = deck.path.read_bytes().splitlines()
+    assert json.loads(lines[0])["format"] == "card_creator.deck"
+    # Raccourci "title" et seules les clés qui diffèrent du modèle
+    assert json.loads(lines[2]) == {"title": "Elfe", "card_bg_color": "red"}
+
+
+def test_template_is_a_copy(deck):
+    deck.template["title"]["font_size"] = 99
+    assert deck.template["title"]["font_size"] == 42
+
+
+def test_card_delta_is_recursive():
+    template = make_template()
+    params = template_from_params(template)
+    params["photo"]["frame_position"] = (1, 2)
+    assert card_delta(template, params) == {"photo": {"frame_position": (1, 2)}}
+
+
+def test_replace_shifts_following_cards(deck):
+    deck.replace(0, card("Dragon rouge des montagnes", text={"fit_to_frame": True}))
+    assert titles(deck) == ["Dragon rouge des montagnes", "Elfe", "Troll"]
+    assert deck.card_params(0)["text"]["fit_to_frame"] is True
+
+    deck.replace(1, card("E"))
+    assert titles(deck) == ["Dragon rouge des montagnes", "E", "Troll"]
+    assert deck.card_params(1)["card_bg_color"] == "#102030"
+
+    with pytest.raises(IndexError):
+        deck.replace(3, card("Hors deck"))
+
+
+def test_append(deck):
+    assert deck.append(card("Gobelin")) == 3
+    assert len(deck) == 4
+    assert titles(deck) == ["Dragon", "Elfe", "Troll", "Gobelin"]
+    # Paramètres complets acceptés : seul le delta est écrit
+    assert deck.append(deck.card_params(1)) == 4
+    assert deck.card(4) == deck.card(1)
+
+
+def test_set_template_keeps_card_overrides(deck):
+    template = make_template()
+    template["card_bg_color"] = "white"   # en-tête de longueur différente : positions décalées
+    template["title"]["font_size"] = 60
+    deck.set_template(template)
+
+    assert len(deck) == 3
+    assert titles(deck) == ["Dragon", "Elfe", "Troll"]
+    assert deck.card_params(0)["card_bg_color"] == "white"
+    assert deck.card_params(1)["card_bg_color"] == "red"
+    assert deck.card_params(2)["title"]["font_size"] == 60
+
+
+def test_external_edit_rebuilds_index(deck):
+    lines = deck.path.read_bytes().splitlines(keepends=True)
+    lines[1] = b'{"title":"Dragon de glace","photo_path":"img/dragon.png"}\n'
+    lines.append(b"\n")
+    lines.append(b'{"title":"Ajout manuel"}\n')
+    deck.path.write_bytes(b"".join(lines))
+
+    reopened = DeckFile(deck.path)
+    assert len(reopened) == 4
+    assert titles(reopened) == ["Dragon de glace", "Elfe", "Troll", "Ajout manuel"]
+    # Photo relative : résolue par rapport au dossier du deck
+    assert reopened.card(0)["photo"]["photo_path"] == str(deck.path.parent / "img/dragon.png")
+    assert [c["title"]["text"] for c in reopened] == titles(reopened)
+
+
+def test_missing_or_corrupt_index_is_rebuilt(deck):
+    deck.index_path.unlink()
+    assert titles(DeckFile(deck.path)) == ["Dragon", "Elfe", "Troll"]
+
+    deck.index_path.write_bytes(b"pas un index")
+    assert titles(DeckFile(deck.path)) == ["Dragon", "Elfe", "Troll"]
+
+
+def test_invalid_card_is_reported(deck):
+    with open(deck.path, "ab") as f:
+        f.write(b'{"title":{"font_size":"grand"}}\n')
+    reopened = DeckFile(deck.path)
+    with pytest.raises(ParamsError, match="carte 4"):
+        reopened.card(3)
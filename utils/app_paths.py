@@ -0,0 +1,31 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+import sys
+from pathlib import Path
+
+
+def get_exec_dir() -> Path:
+    if getattr(sys, 'frozen', False):
+        return Path(sys.executable).resolve().parent
+    else:
+        return Path(__file__).resolve().parent.parent
+
+def get_assets_dir() -> Path:
+    if getattr(sys, 'frozen', False):
+        return Path(sys._MEIPASS) / "assets"
+    else:
+        return Path(__file__).resolve().parent.parent / "assets"
+
+ROOT_DIR = get_exec_dir()
+FONT_DIR = get_assets_dir()
+BACKGROUND_DIR = FONT_DIR/"background_imgs"
+GENERATE_DIR = ROOT_DIR / "generated"
+CONFIG_DIR = ROOT_DIR / "config"   # dossier persistant utilisateur
+ORIGIN_PIC_DIR = ROOT_DIR / "origin_pics"
+
+for d in (CONFIG_DIR, GENERATE_DIR, ORIGIN_PIC_DIR):
+    d.mkdir(exist_ok=True)
+PARAMS_FILE = CONFIG_DIR / "params.json"
+LEGACY_PARAMS_FILE = CONFIG_DIR / "params.pkl"   # ancien format pickle, migré au chargement
+RENDER_CACHE_DIR = CONFIG_DIR / "render_cache"   # cache disque des rendus (voir utils/disk_cache.py)
@@ -0,0 +1,335 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+import copy
+import csv
+import io
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from utils.build_manifest import card_inputs_hash
+from utils.card_renderer import CardRenderer
+from utils.disk_cache import disk_cache
+from utils.image_cache import image_cache, image_headers
+from utils.params_io import OPTIONAL_PATH, SCHEMA, STR, load_params, restore_pairs, validate_params
+
+
+# Raccourcis acceptés dans le fichier de données -> chemin dans le dictionnaire de paramètres
+SHORTCUT_KEYS = {
+    "title": ("title", "text"),
+    "photo_path": ("photo", "photo_path"),
+    "text_element": ("text", "text_element"),
+}
+
+
+
+def load_base_params(path) -> dict:
+    """
+    Charge le dictionnaire de paramètres de base (config/params.json, ancien params.pkl
+    ou .json de même structure), migré et validé : voir utils.params_io.load_params.
+    """
+    return load_params(path)
+
+
+def _set_nested(card: dict, keys: tuple, value):
+    target = card
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+
+def _csv_value(column: str, text: str):
+    """
+    Valeur d'une cellule CSV, selon le type de la clé dans SCHEMA : les chaînes et chemins restent du texte,
+    les autres types (nombres, booléens, paires, couleurs RGB, blocs de texte) sont lus en JSON
+    ("50", "true", "[120, 80]"). Un texte qui n'est pas du JSON (nom de couleur, "#RRGGBB") est gardé
+    tel quel : la validation signale ensuite une valeur du mauvais type.
+    """
+    expected = SCHEMA
+    for key in SHORTCUT_KEYS.get(column, column.split(".")):
+        expected = expected.get(key) if isinstance(expected, dict) else None
+    if not text or expected is None or isinstance(expected, dict) or expected in (STR, OPTIONAL_PATH):
+        return text
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def normalize_card(raw: dict) -> dict:
+    """
+    Convertit une entrée du fichier de données en dictionnaire de surcharges imbriqué.
+
+    Accepte les raccourcis (title, photo_path, text_element), les clés pointées
+    ("title.color", "photo.frame_position"...) et les sous-dictionnaires.
+    La clé "name" (nom du fichier de sortie) est conservée telle quelle.
+    """
+    card = {}
+    for key, value in raw.items():
+        if value is None or value == "":
+            continue
+        if key == "name":
+            card["name"] = value
+        elif key in SHORTCUT_KEYS and not isinstance(value, dict):
+            _set_nested(card, SHORTCUT_KEYS[key], value)
+        elif "." in key:
+            _set_nested(card, tuple(key.split(".")), value)
+        else:
+            card[key] = value
+    return card
+
+
+def load_deck(path) -> list[dict]:
+    """
+    Lit un fichier de données (.json ou .csv) et retourne la liste des surcharges par carte.
+
+    Les chemins de photo relatifs sont résolus par rapport au dossier du fichier de données.
+    Chaque carte est validée contre le schéma des paramètres (ParamsError sinon).
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = []
+            for row in csv.DictReader(f):
+                rows.append({key: _csv_value(key, value) for key, value in row.items()})
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows["cards"]
+
+    cards = [normalize_card(row) for row in rows]
+    for index, card in enumerate(cards):
+        validate_params(card, partial=True, where=f"{path.name}, carte {index + 1} : ")
+        restore_pairs(card)
+        photo_path = card.get("photo", {}).get("photo_path")
+        if photo_path and not Path(photo_path).is_absolute():
+            card["photo"]["photo_path"] = str(path.parent / photo_path)
+    return cards
+
+
+def merge_params(base: dict, overrides: dict) -> dict:
+    """
+    Fusion récursive : les sous-dictionnaires sont fusionnés, les autres valeurs (listes comprises) remplacées.
+    """
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if key == "name":
+            continue
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_params(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def card_file_name(index: int, card: dict, params: dict) -> str:
+    name = card.get("name") or f"Carte {params.get('title', {}).get('text', '')}".strip()
+    name = re.sub(r'[<>:"/\\|?*]', "_", name)
+    return f"{index + 1:04d} - {name}.jpg"
+
+
+def _input_digest(path):
+    try:
+        return image_headers.digest(path)
+    except OSError:
+        return None
+
+
+def card_jpeg(renderer, params: dict, quality: int) -> bytes:
+    """
+    JPEG de la carte. Relu dans le cache disque si une carte aux mêmes entrées (paramètres, qualité,
+    contenu des polices et images) a déjà été générée, par l'IHM comme par un export.
+    """
+    key = card_inputs_hash(renderer, params, quality, _input_digest) if disk_cache.enabled else None
+    data = disk_cache.get(key, ".jpg") if key else None
+    if data is None:
+        buffer = io.BytesIO()
+        renderer.create_card_image(params).convert("RGB").save(buffer, "JPEG", quality=quality)
+        data = buffer.getvalue()
+        if key:
+            disk_cache.put(key, data, ".jpg")
+    return data
+
+
+def _render_card(renderer, base_params: dict, index: int, card: dict, output_dir: Path, quality: int):
+    start = time.perf_counter()
+    params = merge_params(base_params, card)
+    path = output_dir / card_file_name(index, card, params)
+    path.write_bytes(card_jpeg(renderer, params, quality))
+    return index, path, time.perf_counter() - start
+
+
+def _encode_card(renderer, base_params: dict, card: dict, quality: int) -> bytes:
+    return card_jpeg(renderer, merge_params(base_params, card), quality)
+
+
+def _report_progress(done: int, total: int, path: Path, elapsed: float):
+    print(f"[{done}/{total}] {path.name} ({elapsed:.2f} s)")
+
+
+def _report_summary(total: int, elapsed: float, card_times: list):
+    if not total:
+        return
+    print(f"{total} cartes générées en {elapsed:.1f} s "
+          f"({total / elapsed:.1f} cartes/s, {sum(card_times) / total:.2f} s/carte en moyenne)")
+
+
+def _report_image_cache():
+    for label, cache in (("images", image_cache), ("disque", disk_cache)):
+        stats = cache.stats()
+        print(f"Cache {label} : {stats['hits']} hits / {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%}), {stats['evictions']} évictions, "
+              f"{stats['bytes'] / 2**20:.0f} / {stats['max_bytes'] / 2**20:.0f} Mo")
+
+
+def _plan_deck(renderer, base_params: dict, cards: list[dict], output_dir: Path, quality: int, manifest):
+    """
+    Fichier de sortie de chaque carte, et cartes à générer [(index, carte, empreinte)] : toutes sans
+    manifeste, sinon seulement celles dont les entrées ont changé depuis la dernière génération.
+    """
+    written, todo = [], []
+    for index, card in enumerate(cards):
+        params = merge_params(base_params, card)
+        path = output_dir / card_file_name(index, card, params)
+        written.append(path)
+        card_hash = manifest.card_hash(renderer, params, quality) if manifest is not None else None
+        if card_hash is None or not manifest.is_current(path, card_hash):
+            todo.append((index, card, card_hash))
+    if len(todo) < len(cards):
+        print(f"{len(cards) - len(todo)} cartes à jour, non régénérées")
+    return written, todo
+
+
+def card_hashes(manifest, base_params: dict, cards: list[dict], font_dirs=(), quality=95) -> list[str]:
+    """Empreinte des entrées de chaque carte (BuildManifest.card_hash), ex. pour PrintablePDFBuilder.content_key."""
+    renderer = CardRenderer(font_dirs=font_dirs)
+    return [manifest.card_hash(renderer, merge_params(base_params, card), quality) for card in cards]
+
+
+def render_deck(base_params: dict, cards: list[dict], output_dir, font_dirs=(), quality=95, manifest=None):
+    """
+    Génère toutes les cartes du deck dans output_dir, sans interface graphique.
+    manifest : BuildManifest de output_dir ; seules les cartes dont les entrées ont changé sont alors générées.
+
+    Retourne la liste des fichiers du deck, dans l'ordre du deck.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    renderer = CardRenderer(font_dirs=font_dirs)
+    written, todo = _plan_deck(renderer, base_params, cards, output_dir, quality, manifest)
+
+    start = time.perf_counter()
+    card_times = []
+    try:
+        for done, (index, card, card_hash) in enumerate(todo, start=1):
+            _, path, elapsed = _render_card(renderer, base_params, index, card, output_dir, quality)
+            if manifest is not None:
+                manifest.record_card(path, card_hash)
+            card_times.append(elapsed)
+            _report_progress(done, len(todo), path, elapsed)
+    finally:
+        if manifest is not None:
+            manifest.save()
+    _report_summary(len(todo), time.perf_counter() - start, card_times)
+    _report_image_cache()
+    return written
+
+
+# =========================
+# Génération multi-processus
+# =========================
+# Chaque worker garde son propre CardRenderer (polices et images sources déjà décodées)
+# et les paramètres de base, transmis une seule fois à l'initialisation du processus.
+_worker_renderer = None
+_worker_base_params = None
+_worker_output_dir = None
+_worker_quality = 95
+
+
+def _init_worker(base_params: dict, output_dir: Path, font_dirs, quality: int, image_cache_bytes, disk_cache_config):
+    global _worker_renderer, _worker_base_params, _worker_output_dir, _worker_quality
+    if image_cache_bytes:
+        image_cache.set_max_bytes(image_cache_bytes)
+    disk_cache.configure(*disk_cache_config)
+    _worker_renderer = CardRenderer(font_dirs=font_dirs)
+    _worker_base_params = base_params
+    _worker_output_dir = output_dir
+    _worker_quality = quality
+
+
+def _render_card_in_worker(index: int, card: dict):
+    return _render_card(_worker_renderer, _worker_base_params, index, card, _worker_output_dir, _worker_quality)
+
+
+def _encode_card_in_worker(card: dict) -> bytes:
+    return _encode_card(_worker_renderer, _worker_base_params, card, _worker_quality)
+
+
+def iter_deck_jpegs(base_params: dict, cards: list[dict], font_dirs=(), quality=95, workers=1,
+                    image_cache_bytes=None):
+    """
+    Cartes du deck encodées en JPEG en mémoire, dans l'ordre du deck, sans rien écrire sur le disque
+    (ex: pour PrintablePDFBuilder.write_pdf).
+
+    workers : nombre de processus (None = nombre de coeurs). Au plus deux cartes par worker sont générées
+    en avance sur le consommateur : la mémoire reste bornée quelle que soit la taille du deck.
+    """
+    if workers == 1:
+        renderer = CardRenderer(font_dirs=font_dirs)
+        for card in cards:
+            yield _encode_card(renderer, base_params, card, quality)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(base_params, None, [str(d) for d in font_dirs], quality,
+                                       image_cache_bytes, disk_cache.config())) as executor:
+        pending = deque()
+        for card in cards:
+            pending.append(executor.submit(_encode_card_in_worker, card))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def render_deck_parallel(base_params: dict, cards: list[dict], output_dir, font_dirs=(), quality=95, workers=None,
+                         image_cache_bytes=None, manifest=None):
+    """
+    Comme render_deck, mais répartit les cartes sur un pool de processus.
+    Chaque worker a son propre cache d'images, borné à image_cache_bytes.
+
+    Chaque worker écrit directement son JPEG dans output_dir dès qu'il est prêt ;
+    la progression est affichée au fil des cartes terminées. Le manifeste n'est lu et écrit
+    que par le processus principal.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    written, todo = _plan_deck(CardRenderer(font_dirs=font_dirs), base_params, cards, output_dir, quality, manifest)
+
+    start = time.perf_counter()
+    card_times = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(base_params, output_dir, [str(d) for d in font_dirs], quality,
+                                           image_cache_bytes, disk_cache.config())) as executor:
+            futures = {executor.submit(_render_card_in_worker, index, card): card_hash
+                       for index, card, card_hash in todo}
+            for done, future in enumerate(as_completed(futures), start=1):
+                index, path, elapsed = future.result()
+                if manifest is not None:
+                    manifest.record_card(path, futures[future])
+                card_times.append(elapsed)
+                _report_progress(done, len(todo), path, elapsed)
+    finally:
+        if manifest is not None:
+            manifest.save()
+    _report_summary(len(todo), time.perf_counter() - start, card_times)
+    return written
@@ -0,0 +1,132 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+"""
+Manifeste de génération incrémentale, à la manière de make.
+
+Le fichier .build_manifest.json du dossier de sortie garde, pour chaque image générée, l'empreinte
+de ses entrées : paramètres effectifs de la carte, qualité JPEG et contenu des fichiers utilisés
+(polices, photo, arrière-plan). Une carte n'est régénérée que si cette empreinte a changé ou si
+son image a disparu. De même, un PDF n'est réécrit que si le contenu de ses pages a changé.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from utils.params_io import plain_params
+
+
+MANIFEST_NAME = ".build_manifest.json"
+# À incrémenter quand le rendu change à paramètres égaux : toutes les cartes seront régénérées
+MANIFEST_VERSION = 1
+
+
+def card_inputs_hash(renderer, params: dict, quality: int, file_digest) -> str:
+    """
+    Empreinte des entrées de la carte : paramètres effectifs, qualité JPEG et contenu des fichiers
+    utilisés (file_digest(chemin) -> empreinte, ou None si le fichier n'existe pas).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([MANIFEST_VERSION, quality, plain_params(params)], sort_keys=True,
+                        ensure_ascii=False).encode("utf-8"))
+    for path in renderer.input_files(params):
+        h.update(f"\n{path}\0{file_digest(path)}".encode("utf-8"))
+    return h.hexdigest()
+
+
+class BuildManifest:
+    """
+    Empreintes des cartes et PDF déjà générés dans un dossier.
+
+    Les empreintes des fichiers d'entrée sont conservées avec (mtime, taille) : un fichier
+    n'est relu que s'il a été modifié, et un fichier simplement touché ne régénère rien.
+    """
+    def __init__(self, directory):
+        self.path = Path(directory) / MANIFEST_NAME
+        self._files = {}   # chemin -> [mtime_ns, taille, empreinte]
+        self._cards = {}   # nom de l'image -> {"hash", "size"}
+        self._pdfs = {}    # chemin du PDF -> {"hash", "size", "stats"}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and data.get("version") == MANIFEST_VERSION:
+            self._files = data.get("files", {})
+            self._cards = data.get("cards", {})
+            self._pdfs = data.get("pdfs", {})
+
+    def reset(self):
+        """Oublie les cartes et PDF générés (génération complète), en gardant les empreintes des fichiers."""
+        self._cards.clear()
+        self._pdfs.clear()
+
+    def save(self):
+        """Écriture atomique : un manifeste interrompu ne peut pas faire passer une carte pour à jour."""
+        data = {"version": MANIFEST_VERSION, "files": self._files, "cards": self._cards, "pdfs": self._pdfs}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def file_digest(self, path):
+        """Empreinte du contenu d'un fichier d'entrée, None s'il n'existe pas."""
+        path = str(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        entry = self._files.get(path)
+        if entry is None or entry[0] != stat.st_mtime_ns or entry[1] != stat.st_size:
+            with open(path, "rb") as f:
+                digest = hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+            entry = self._files[path] = [stat.st_mtime_ns, stat.st_size, digest]
+        return entry[2]
+
+    # =========================
+    # Cartes
+    # =========================
+    def card_hash(self, renderer, params: dict, quality: int) -> str:
+        """card_inputs_hash, avec les empreintes de fichiers conservées dans le manifeste."""
+        return card_inputs_hash(renderer, params, quality, self.file_digest)
+
+    @staticmethod
+    def _output_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return None
+
+    def is_current(self, output_path, card_hash: str) -> bool:
+        """L'image existe et a été générée à partir des mêmes entrées."""
+        entry = self._cards.get(Path(output_path).name)
+        return (entry is not None and entry["hash"] == card_hash
+                and entry["size"] == self._output_size(output_path))
+
+    def record_card(self, output_path, card_hash: str):
+        self._cards[Path(output_path).name] = {"hash": card_hash, "size": self._output_size(output_path)}
+
+    # =========================
+    # PDF
+    # =========================
+    def write_pdf(self, builder, cards, output, content_key: str) -> dict:
+        """
+        builder.write_pdf(cards, output), sauf si output a déjà été écrit avec le même content_key
+        (voir PrintablePDFBuilder.content_key) : cards n'est alors pas consommé.
+        Retourne les statistiques de write_pdf, avec "skipped" à True si le PDF était à jour.
+        """
+        key = str(Path(output).resolve())
+        entry = self._pdfs.get(key)
+        if entry is not None and entry["hash"] == content_key and entry["size"] == self._output_size(output):
+            return dict(entry["stats"], skipped=True, elapsed=0.0)
+
+        stats = builder.write_pdf(cards, output)
+        self._pdfs[key] = {"hash": content_key, "size": self._output_size(output), "stats": stats}
+        self.save()
+        return dict(stats, skipped=False)
@@ -0,0 +1,618 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+import copy
+import math
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+
+from utils.font_cache import font_cache
+from utils.image_cache import image_cache
+from utils.text_layout import TextLayoutEngine, text_layout
+
+
+# Police du titre (cherchée dans font_dirs)
+TITLE_FONT = "DejaVuSans.ttf"
+
+
+def default_card_params() -> dict:
+    """
+    Paramètres par défaut d'une carte (utilisés quand config/params.json n'existe pas).
+    """
+    return {
+        "frame_dimensions": (1260, 1760),
+        "card_bg_color": "green",
+        "card_outline_color": "black",
+        "card_outline_width": 10,
+        "title": {
+            "text": "",
+            "font_size": 68,
+            "color": "white",
+            "title_position": (30, 10),
+            "text_outline_color": "black"
+        },
+        "background": {
+            "background_path": None,
+            "display_background": False
+        },
+        "photo": {
+            "frame_dimensions": (1200, 750),
+            "frame_position": (30, 100),
+            "frame_bg_color": "#EFD5B2",
+            "background_opacity": 70,
+            "frame_rounded_radius": 40,
+            "frame_outline_color": "black",
+            "frame_outline_width": 10,
+            "photo_path": ""
+        },
+        "text": {
+            "frame_dimensions": (1200, 850),
+            "frame_position": (30, 870),
+            "font_size_regular": 60,
+            "font_size_bold": 60,
+            "font_size_italic": 44,
+            "text_color": "black",
+            "frame_rounded_radius": 40,
+            "padding": 60,
+            "frame_outline_color": "black",
+            "frame_outline_width": 10,
+            "font_regular": "Lato-Regular.ttf",
+            "font_bold": "Lato-Black.ttf",
+            "font_italic": "Lato-Italic.ttf",
+            "frame_bg_color": "#b4b4b4",
+            "background_opacity": 70,
+            "fit_to_frame": False,
+            "text_element": []
+        }
+    }
+
+
+def scale_card_params(params: dict, scale: float) -> dict:
+    """
+    Copie des paramètres avec toutes les grandeurs en pixels multipliées par scale.
+    Une épaisseur ou un rayon non nul reste d'au moins 1 pixel.
+    """
+    def length(v):
+        return max(1, round(v * scale)) if v else v
+
+    def point(p):
+        return tuple(round(v * scale) for v in p)
+
+    def size(p):
+        return tuple(max(1, round(v * scale)) for v in p)
+
+    params = copy.deepcopy(params)
+    params["frame_dimensions"] = size(params["frame_dimensions"])
+    params["card_outline_width"] = length(params["card_outline_width"])
+
+    title = params.get("title", {})
+    if "font_size" in title:
+        title["font_size"] = length(title["font_size"])
+    if "title_position" in title:
+        title["title_position"] = point(title["title_position"])
+
+    for frame in (params.get("photo", {}), params.get("text", {})):
+        frame["frame_position"] = point(frame["frame_position"])
+        frame["frame_dimensions"] = size(frame["frame_dimensions"])
+        frame["frame_rounded_radius"] = length(frame["frame_rounded_radius"])
+        frame["frame_outline_width"] = length(frame["frame_outline_width"])
+
+    text = params.get("text", {})
+    for key in ("padding", "font_size_regular", "font_size_bold", "font_size_italic"):
+        if key in text:
+            text[key] = length(text[key])
+    return params
+
+
+class RenderCancelled(Exception):
+    """Rendu abandonné car ses paramètres ne sont plus d'actualité."""
+
+
+class CardRenderer:
+    """
+    Génération de l'image d'une carte à partir du dictionnaire de paramètres.
+
+    Ne dépend pas de tkinter : utilisable aussi bien par CardPreview que par
+    un export en ligne de commande sur une machine sans affichage.
+    """
+    def __init__(self, font_dirs=()):
+        self.font_dirs = [Path(d) for d in font_dirs]
+        self._font_paths = {}
+
+        # Rendu par couches : {nom: (clé, (image, position) ou None)} et superpositions intermédiaires
+        self._layers = {}
+        self._composites = []
+        self._lock = threading.Lock()
+        self._rect_overlays = OrderedDict()
+
+    def _resolve_font(self, font) -> str:
+        """
+        Retourne le chemin de la police : tel quel s'il existe, sinon cherché dans font_dirs
+        (les paramètres ne contiennent parfois que le nom du fichier, ex: "Lato-Regular.ttf").
+        """
+        path = self._font_paths.get(font)
+        if path is None:
+            path = Path(font)
+            if not path.is_absolute():
+                for font_dir in self.font_dirs:
+                    if (font_dir / path).exists():
+                        path = font_dir / path
+                        break
+            path = self._font_paths[font] = str(path)
+        return path
+
+    def input_files(self, params: dict) -> list:
+        """
+        Fichiers dont dépend le rendu de la carte (polices, photo, arrière-plan affiché),
+        pour savoir quelles cartes régénérer quand l'un d'eux change.
+        """
+        text = params.get("text", {})
+        files = [self._resolve_font(TITLE_FONT)]
+        files += [self._resolve_font(text[key]) for key in ("font_regular", "font_bold", "font_italic") if text.get(key)]
+        if params.get("photo", {}).get("photo_path"):
+            files.append(str(params["photo"]["photo_path"]))
+        background = params.get("background", {})
+        if background.get("display_background") and background.get("background_path"):
+            files.append(str(background["background_path"]))
+        return files
+
+    def _load_font(self, font, size):
+        return font_cache.get(self._resolve_font(font), size)
+
+    def _draw_rectangle(
+            self,
+            img,
+            position: tuple,
+            dimensions: tuple,
+            color,
+            round_radius=0,
+            outline_color="black",
+            outline_width=0,
+            opacity=100
+    ):
+        """
+        Parameters
+        ----------
+        img
+        position
+        dimensions
+        color
+        round_radius
+        outline_color
+        outline_width
+        opacity: int
+            0 - 100 (0 = transparent)
+        Returns
+        -------
+
+        """
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
+
+        # Seule la zone du rectangle est dessinée et fusionnée, pas la carte entière
+        overlay = self._rounded_rectangle_overlay(dimensions, color, round_radius,
+                                                  outline_color, outline_width, opacity)
+        self._composite_at(img, overlay, position)
+
+        return img
+
+    def _rounded_rectangle_overlay(self, dimensions: tuple, color, round_radius=0, outline_color="black",
+                                   outline_width=0, opacity=100) -> Image.Image:
+        """
+        Rectangle arrondi seul, dans une image RGBA de la taille du rectangle (mêmes paramètres que _draw_rectangle).
+
+        Le résultat est mis en cache par (taille, rayon, épaisseur du contour, couleurs) : image partagée,
+        ne pas la modifier en place.
+        """
+        w, h = dimensions
+        opacity = int((opacity)*255/100)
+
+        if color is None:
+            fill_color = None
+        elif isinstance(color, str):
+            r, g, b = ImageColor.getrgb(color)
+            fill_color = (r, g, b, opacity)
+        elif isinstance(color, tuple):
+            if len(color) == 4:
+                r, g, b, _ = color
+            else:
+                r, g, b = color
+            fill_color = (r, g, b, opacity)
+        else:
+            raise ValueError("Format de couleur non supporté")
+
+        # rounded_rectangle([x0, y0, x0 + w, y0 + h]) couvre w + 1 x h + 1 pixels
+        size = (w + 1, h + 1)
+        key = (size, round_radius, outline_width, fill_color, outline_color if outline_width else None)
+        overlay = self._rect_overlays.get(key)
+        if overlay is not None:
+            self._rect_overlays.move_to_end(key)
+            return overlay
+
+        overlay = Image.new("RGBA", size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(overlay)
+        if not outline_width:
+            draw.rounded_rectangle([0, 0, w, h], round_radius, fill=fill_color)
+        else:
+            draw.rounded_rectangle([0, 0, w, h], round_radius, fill=fill_color,
+                                   outline=outline_color, width=outline_width)
+
+        self._rect_overlays[key] = overlay
+        if len(self._rect_overlays) > 16:
+            self._rect_overlays.popitem(last=False)
+        return overlay
+
+    @staticmethod
+    def _composite_at(img, overlay, position):
+        """alpha_composite de overlay à `position`, même partiellement hors de img."""
+        x, y = position
+        if x < 0 or y < 0:
+            if x + overlay.width <= 0 or y + overlay.height <= 0:
+                return
+            overlay = overlay.crop((max(0, -x), max(0, -y), overlay.width, overlay.height))
+            x, y = max(0, x), max(0, y)
+        if x < img.width and y < img.height:
+            img.alpha_composite(overlay, (x, y))
+
+    def _add_photo(self, img_card, params_photo: dict, persist=False):
+        frame_w, frame_h = params_photo["frame_dimensions"][0], params_photo["frame_dimensions"][1]
+        frame_w -= params_photo["frame_outline_width"] * 2
+        frame_h -= params_photo["frame_outline_width"] * 2
+        frame_x, frame_y = params_photo["frame_position"]
+        frame_x += params_photo["frame_outline_width"]
+        frame_y += params_photo["frame_outline_width"]
+        if not params_photo["photo_path"]:
+            return
+        img_photo = image_cache.get_resized(params_photo["photo_path"], (frame_w, frame_h), Image.LANCZOS,
+                                           keep_ratio=True, persist=persist)
+        new_w, new_h = img_photo.size
+
+        paste_x = frame_x + (frame_w - new_w)//2
+        paste_y = frame_y + (frame_h - new_h)//2
+
+        if img_photo.mode == "RGBA" and img_card.mode == "RGBA":
+            img_card.alpha_composite(img_photo, (paste_x, paste_y))
+        elif img_photo.mode == "RGBA":
+            img_card.paste(img_photo, (paste_x, paste_y), img_photo)
+        else:
+            img_card.paste(img_photo, (paste_x, paste_y))
+
+    def _text_fonts(self, text_params: dict):
+        """
+        Polices régulière / gras / italique du texte, et une clé qui les identifie pour le moteur de mise en page.
+        """
+        try:
+            fonts, keys = {}, []
+            for role in TextLayoutEngine.ROLES:
+                font, size = text_params[f"font_{role}"], text_params[f"font_size_{role}"]
+                fonts[role] = self._load_font(font, size)
+                keys.append((self._resolve_font(font), size))
+            return fonts, tuple(keys)
+        except:
+            font = ImageFont.load_default()
+            return dict.fromkeys(TextLayoutEngine.ROLES, font), ("default",) * 3
+
+    @staticmethod
+    def _text_box(text_params: dict, scale=1.0):
+        """
+        Zone de texte dans le cadre : (x, y, largeur max, hauteur max, interligne).
+        """
+        frame_x, frame_y = text_params["frame_position"]
+        frame_w, frame_h = text_params["frame_dimensions"]
+        padding = text_params["padding"]
+        margin = round(5 * scale)
+        return (frame_x + padding + margin, frame_y + padding + margin,
+                frame_w - padding * 2 - margin * 2, frame_h - padding * 2 - margin * 2, round(4 * scale))
+
+    def _fit_text_params(self, text_params: dict, max_width, max_height, line_spacing) -> dict:
+        """
+        fit_to_frame : copie de text_params avec la plus grande taille de police pour laquelle tous les blocs
+        tiennent dans le cadre. Les trois polices gardent leurs proportions ; recherche dichotomique sur la
+        taille régulière, chaque essai n'étant qu'une mise en page (mesures de police, sans dessin).
+        """
+        base_size = text_params["font_size_regular"]
+        ratios = {role: text_params[f"font_size_{role}"] / base_size for role in TextLayoutEngine.ROLES}
+
+        def sized(size):
+            fitted = dict(text_params)
+            for role, ratio in ratios.items():
+                fitted[f"font_size_{role}"] = max(1, round(size * ratio))
+            return fitted
+
+        def fits(size):
+            fitted = sized(size)
+            fonts, font_keys = self._text_fonts(fitted)
+            lines, height = text_layout.layout(fitted["text_element"], fonts, font_keys, max_width, line_spacing)
+            return height <= max_height and text_layout.max_line_width(lines, fonts, font_keys) <= max_width
+
+        # Une ligne est plus haute que la taille de police : max_height est une borne supérieure
+        low, high = 1, max(1, max_height)
+        while low < high:
+            size = (low + high + 1) // 2
+            if fits(size):
+                low = size
+            else:
+                high = size - 1
+        return sized(low)
+
+    def _add_card_text(self, img_card, text_params, scale=1.0):
+        x_start, y, max_width, max_height, line_spacing = self._text_box(text_params, scale)
+        if text_params.get("fit_to_frame") and text_params["text_element"] and text_params["font_size_regular"]:
+            text_params = self._fit_text_params(text_params, max_width, max_height, line_spacing)
+        fonts, font_keys = self._text_fonts(text_params)
+        draw = ImageDraw.Draw(img_card)
+
+        # Mise en page (mesures en cache, blocs inchangés réutilisés), puis dessin des lignes
+        lines, _ = text_layout.layout(text_params["text_element"], fonts, font_keys, max_width, line_spacing)
+        for dx, dy, text, role in lines:
+            draw.text((x_start + dx, y + dy), text, font=fonts[role], fill="black")
+
+    def _add_background_image(self, img_card: Image, params: dict, persist=False):
+        background_path = params.get("background_path")
+        if not background_path:
+            return img_card
+
+        opacity = params.get("opacity", 255)
+        keep_ratio = params.get("keep_ratio", False)
+
+        if img_card.mode != "RGBA":
+            img_card = img_card.convert("RGBA")
+
+        width, height = img_card.size
+
+        bg = image_cache.get_resized(background_path, (width, height), Image.LANCZOS,
+                                     keep_ratio=keep_ratio, mode="RGBA", persist=persist)
+
+        if keep_ratio:
+            background_layer = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+            x = (width - bg.width) // 2
+            y = (height - bg.height) // 2
+            background_layer.paste(bg, (x, y))
+            bg = background_layer
+
+        if opacity < 255:
+            bg = bg.copy()  # image partagée par le cache
+            alpha = bg.split()[3]
+            alpha = alpha.point(lambda p: p * (opacity / 255))
+            bg.putalpha(alpha)
+
+        # --- Fusion ---
+        img_card.alpha_composite(bg)
+
+        return img_card
+
+    # =========================
+    # MESURES (SANS RENDU)
+    # =========================
+    @staticmethod
+    def _overlap_area(box_a, box_b) -> int:
+        if box_a is None or box_b is None:
+            return 0
+        w = min(box_a[2], box_b[2]) - max(box_a[0], box_b[0])
+        h = min(box_a[3], box_b[3]) - max(box_a[1], box_b[1])
+        return max(0, w) * max(0, h)
+
+    def measure_card(self, params: dict) -> dict:
+        """
+        Mesures de mise en page d'une carte à partir des seules métriques de police, sans allouer d'image :
+        hauteur du texte, débordement du cadre texte (en pixels) et chevauchement du titre avec le cadre photo.
+        """
+        text_params = params.get("text", {})
+        _, _, max_width, max_height, line_spacing = self._text_box(text_params)
+        if text_params.get("fit_to_frame") and text_params["text_element"] and text_params["font_size_regular"]:
+            text_params = self._fit_text_params(text_params, max_width, max_height, line_spacing)
+        fonts, font_keys = self._text_fonts(text_params)
+        lines, height = text_layout.layout(text_params["text_element"], fonts, font_keys, max_width, line_spacing)
+        width = text_layout.max_line_width(lines, fonts, font_keys)
+
+        title = params.get("title", {})
+        title_box = None
+        if title.get("text"):
+            x, y = title.get("title_position", (20, 10))
+            left, top, right, bottom = self._title_font(title).getbbox(title["text"])
+            # Contour du titre : décalé d'un pixel dans les quatre diagonales
+            outline = 1 if title.get("text_outline_color") else 0
+            title_box = (x + left - outline, y + top - outline, x + right + outline, y + bottom + outline)
+
+        photo = params.get("photo", {})
+        (photo_x, photo_y), (photo_w, photo_h) = photo["frame_position"], photo["frame_dimensions"]
+
+        return {
+            "font_size_regular": text_params["font_size_regular"],
+            "text_height": height,
+            "text_max_height": max_height,
+            "overflow_y": max(0, height - max_height),
+            "overflow_x": max(0, math.ceil(width - max_width)),
+            "title_photo_overlap": self._overlap_area(title_box,
+                                                      (photo_x, photo_y, photo_x + photo_w, photo_y + photo_h)),
+        }
+
+    # =========================
+    # RENDU PAR COUCHES
+    # =========================
+    def _file_stamp(self, path):
+        """mtime du fichier, pour invalider une couche quand l'image source change sur le disque."""
+        try:
+            return os.path.getmtime(path) if path else None
+        except OSError:
+            return None
+
+    def _layer_keys(self, params: dict) -> list:
+        """
+        Clé de chaque couche (dans l'ordre de superposition), construite uniquement à partir des
+        paramètres dont elle dépend. repr() fige l'état : les listes de params sont modifiées en place par l'IHM.
+        """
+        size = tuple(params["frame_dimensions"])
+        background = params["background"]
+        photo = params.get("photo", {})
+        title = params.get("title", {})
+        text = params.get("text", {})
+        background_path = background["background_path"] if background["display_background"] else None
+        photo_frame_keys = ("frame_position", "frame_dimensions", "frame_bg_color", "frame_rounded_radius",
+                            "frame_outline_color", "frame_outline_width", "background_opacity")
+        text_keys = ("frame_position", "frame_dimensions", "padding", "font_regular", "font_bold", "font_italic",
+                     "font_size_regular", "font_size_bold", "font_size_italic", "text_color", "fit_to_frame",
+                     "text_element")
+
+        return [
+            ("background", repr((size, params["card_bg_color"], params["card_outline_color"],
+                                 params["card_outline_width"], background["display_background"],
+                                 str(background_path), self._file_stamp(background_path)))),
+            ("photo_frame", repr((size, [photo.get(k) for k in photo_frame_keys]))),
+            ("title", repr((size, title))),
+            ("photo", repr((size, photo.get("frame_position"), photo.get("frame_dimensions"),
+                            photo.get("frame_outline_width"), photo.get("photo_path"),
+                            self._file_stamp(photo.get("photo_path"))))),
+            ("text_frame", repr((size, [text.get(k) for k in photo_frame_keys]))),
+            ("text", repr((size, [text.get(k) for k in text_keys]))),
+        ]
+
+    def _render_background_layer(self, params: dict, scale=1.0) -> Image.Image:
+        card_w, card_h = params["frame_dimensions"]
+        # Directement en RGBA : évite les conversions RGB -> RGBA dans les étapes suivantes
+        img_card = Image.new("RGBA", (card_w, card_h), params["card_bg_color"])
+
+        if params["background"]["display_background"]:
+            # Seules les images pleine résolution vont dans le cache disque (pas chaque taille de prévisualisation)
+            img_card = self._add_background_image(img_card, {"background_path": params["background"]["background_path"]},
+                                                  persist=scale == 1)
+            img_card = self._draw_rectangle(img_card, (0, 0), (card_w, card_h),
+                                            None,
+                                            outline_color=params["card_outline_color"],
+                                            outline_width=params["card_outline_width"],
+                                            opacity=0)
+        else:
+            img_card = self._draw_rectangle(img_card, (0, 0), (card_w, card_h),
+                                            None,
+                                            outline_color=params["card_outline_color"],
+                                            outline_width=params["card_outline_width"])
+        return img_card
+
+    def _render_photo_frame_layer(self, params: dict, scale=1.0):
+        params_photo = params.get("photo", {})
+        overlay = self._rounded_rectangle_overlay(params_photo["frame_dimensions"], params_photo["frame_bg_color"],
+                                                  params_photo["frame_rounded_radius"],
+                                                  outline_color=params_photo["frame_outline_color"],
+                                                  outline_width=params_photo["frame_outline_width"],
+                                                  opacity=params_photo["background_opacity"])
+        return overlay, tuple(params_photo["frame_position"])
+
+    def _render_title_layer(self, params: dict, scale=1.0) -> Image.Image:
+        size = tuple(params["frame_dimensions"])
+        layer = Image.new("RGBA", size, (0, 0, 0, 0))
+        title = params.get("title", {})
+        if title:
+            font = self._title_font(title)
+            text = title.get("text", "")
+            title_pos_x, title_pos_y = title.get("title_position", (20, 10))
+
+            # Le texte est dessiné en masques de couverture puis fusionné : dessiné directement sur une couche
+            # transparente, l'anticrénelage assombrirait les bords une fois la couche superposée.
+            strokes = []
+            if title.get("text_outline_color", None):
+                outline_mask = Image.new("L", size, 0)
+                draw = ImageDraw.Draw(outline_mask)
+                offset = max(1, round(scale))
+                for dx, dy in ((-offset, -offset), (offset, -offset), (-offset, offset), (offset, offset)):
+                    draw.text((title_pos_x+dx, title_pos_y+dy), text, fill=255, font=font)
+                strokes.append((title.get("text_outline_color", "white"), outline_mask))
+            text_mask = Image.new("L", size, 0)
+            ImageDraw.Draw(text_mask).text((title_pos_x, title_pos_y), text, fill=255, font=font)
+            strokes.append((title.get("color", "white"), text_mask))
+
+            for color, mask in strokes:
+                stroke = Image.new("RGBA", size, color)
+                stroke.putalpha(mask)
+                layer.alpha_composite(stroke)
+        return layer
+
+    def _title_font(self, title: dict):
+        try:
+            return self._load_font(TITLE_FONT, title["font_size"])
+        except Exception:
+            return ImageFont.load_default()
+
+    def _render_photo_layer(self, params: dict, scale=1.0) -> Image.Image:
+        layer = Image.new("RGBA", tuple(params["frame_dimensions"]), (0, 0, 0, 0))
+        self._add_photo(layer, params.get("photo", {}), persist=scale == 1)
+        return layer
+
+    def _render_text_frame_layer(self, params: dict, scale=1.0):
+        text_params = params.get("text", {})
+        overlay = self._rounded_rectangle_overlay(text_params["frame_dimensions"], text_params["frame_bg_color"],
+                                                  text_params["frame_rounded_radius"],
+                                                  outline_color=text_params["frame_outline_color"],
+                                                  outline_width=text_params["frame_outline_width"],
+                                                  opacity=text_params["background_opacity"])
+        return overlay, tuple(text_params["frame_position"])
+
+    def _render_text_layer(self, params: dict, scale=1.0) -> Image.Image:
+        layer = Image.new("RGBA", tuple(params["frame_dimensions"]), (0, 0, 0, 0))
+        self._add_card_text(layer, params.get("text", {}), scale)
+        return layer
+
+    def _render_layer(self, name: str, params: dict, scale=1.0):
+        """
+        Rendu d'une couche, recadrée sur sa zone non transparente.
+        Retourne (image, position) ou None si la couche est vide.
+        """
+        layer = getattr(self, f"_render_{name}_layer")(params, scale)
+        # Une couche peut être déjà limitée à sa zone : (image, position)
+        layer, (x, y) = layer if isinstance(layer, tuple) else (layer, (0, 0))
+        if name == "background":
+            return layer, (x, y)
+        bbox = layer.getbbox()
+        if bbox is None:
+            return None
+        return layer.crop(bbox), (x + bbox[0], y + bbox[1])
+
+    def create_card_image(self, params: dict, should_cancel=None, scale=1.0) -> Image.Image:
+        """
+        Image complète de la carte (RGBA).
+
+        Chaque couche (fond, cadre photo, titre, photo, cadre texte, texte) est mise en cache avec la clé
+        des paramètres dont elle dépend : seules les couches modifiées sont redessinées, et la superposition
+        repart du dernier résultat intermédiaire encore valide.
+
+        should_cancel : fonction optionnelle appelée entre deux couches ; si elle retourne True,
+        le rendu est abandonné (RenderCancelled) et le cache reste cohérent.
+        scale : facteur d'échelle du rendu (ex: taille du canvas de prévisualisation / taille de la carte).
+        Dimensions, positions, tailles de police, contours et rayons sont mis à l'échelle : le coût du rendu
+        est proportionnel à la taille de l'image produite.
+        Peut être appelé depuis plusieurs threads.
+        """
+        if scale != 1:
+            params = scale_card_params(params, scale)
+
+        with self._lock:
+            keys = [(name, repr((scale, key))) for name, key in self._layer_keys(params)]
+
+            for i, (name, key) in enumerate(keys):
+                if self._layers.get(name, (None, None))[0] != key:
+                    # Les superpositions à partir de cette couche ne sont plus valides
+                    del self._composites[i:]
+                    self._check_cancel(should_cancel)
+                    self._layers[name] = (key, self._render_layer(name, params, scale))
+
+            # Superposition à partir du dernier résultat intermédiaire encore valide
+            for name, _ in keys[len(self._composites):]:
+                self._check_cancel(should_cancel)
+                layer = self._layers[name][1]
+                if not self._composites:
+                    img_card = layer[0]
+                elif layer is None:
+                    img_card = self._composites[-1]
+                else:
+                    img_card = self._composites[-1].copy()
+                    self._composite_at(img_card, *layer)
+                self._composites.append(img_card)
+
+            return self._composites[-1].copy()
+
+    @staticmethod
+    def _check_cancel(should_cancel):
+        if should_cancel is not None and should_cancel():
+            raise RenderCancelled()
@@ -0,0 +1,285 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+"""
+Fichier projet de deck (.deck) : un modèle commun et les différences de chaque carte.
+
+Le fichier est du JSON Lines (UTF-8) :
+    ligne 1 : {"format": "card_creator.deck", "version": 1, "template": {...paramètres complets...}}
+    ligne 2+ : une carte par ligne, seulement ce qui diffère du modèle, avec les raccourcis
+               du fichier de données, ex. {"title": "Dragon", "photo_path": "dragon.png", "text_element": [...]}
+
+Un index annexe (<nom>.deck.idx) donne la position de chaque ligne : lire la carte 742 ne lit
+que 16 octets de l'index et la ligne de la carte. L'index est reconstruit (sans décoder le JSON)
+si le .deck a été modifié par un autre programme.
+"""
+
+import json
+import os
+import struct
+from array import array
+from pathlib import Path
+
+from utils.batch_renderer import SHORTCUT_KEYS, merge_params, normalize_card
+from utils.card_renderer import default_card_params
+from utils.params_io import (PARAMS_VERSION, ParamsError, migrate, params_from_document, plain_params,
+                             restore_pairs, validate_params)
+
+
+DECK_FORMAT = "card_creator.deck"
+DECK_SUFFIX = ".deck"
+
+# En-tête de l'index : signature, taille et mtime du .deck indexé ; suivi de n + 1 positions (début de
+# chaque carte, puis fin de la dernière)
+_INDEX_MAGIC = b"CCDIDX1\0"
+_INDEX_HEADER = struct.Struct("<8sQQ")
+_OFFSET = struct.Struct("<QQ")
+
+
+def template_from_params(params: dict) -> dict:
+    """Modèle de deck tiré des paramètres d'une carte : titre, photo et blocs de texte remis à vide."""
+    defaults = default_card_params()
+    return merge_params(params, {section: {key: defaults[section][key]} for section, key in SHORTCUT_KEYS.values()})
+
+
+def card_delta(template, params: dict) -> dict:
+    """Clés de params dont la valeur diffère du modèle (récursif sur les sous-dictionnaires)."""
+    delta = {}
+    for key, value in params.items():
+        base = template.get(key) if isinstance(template, dict) else None
+        if isinstance(value, dict) and isinstance(base, dict):
+            sub = card_delta(base, value)
+            if sub:
+                delta[key] = sub
+        elif plain_params(value) != plain_params(base):
+            delta[key] = value
+    return delta
+
+
+def _compact(delta: dict) -> dict:
+    """Remplace title.text, photo.photo_path et text.text_element par leurs raccourcis quand c'est possible."""
+    delta = plain_params(delta)
+    for name, (section, key) in SHORTCUT_KEYS.items():
+        sub = delta.get(section)
+        if isinstance(sub, dict) and key in sub and (name != section or len(sub) == 1):
+            value = sub.pop(key)
+            if not sub:
+                del delta[section]
+            delta[name] = value
+    return delta
+
+
+def _card_line(delta: dict, deck_dir: Path) -> bytes:
+    delta = _compact(delta)
+    # Photos rangées à côté du deck : chemin relatif, le projet reste déplaçable
+    photo_path = delta.get("photo_path")
+    if photo_path and Path(photo_path).is_absolute() and Path(photo_path).is_relative_to(deck_dir):
+        delta["photo_path"] = Path(photo_path).relative_to(deck_dir).as_posix()
+    return json.dumps(delta, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class DeckFile:
+    """
+    Deck stocké sur disque : accès direct aux cartes par numéro (à partir de 0) via l'index annexe.
+
+        deck = DeckFile("monstres.deck")
+        params = deck.card_params(741)    # paramètres complets de la carte n°742
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + ".idx")
+        self._template = None
+        self._version = None
+
+    # =========================
+    # Création
+    # =========================
+    @classmethod
+    def create(cls, path, template: dict, cards=()) -> "DeckFile":
+        """Écrit un nouveau deck : cards est une suite de surcharges (deltas ou paramètres complets)."""
+        deck = cls(path)
+        header = cls._header_line(template)
+        offsets = array("Q", [len(header)])
+        deck.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = deck.path.with_name(deck.path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(header)
+            for card in cards:
+                line = _card_line(card_delta(template, card), deck.path.resolve().parent)
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+        os.replace(tmp, deck.path)
+        deck._write_index(offsets)
+        return deck
+
+    @staticmethod
+    def _header_line(template: dict) -> bytes:
+        document = {"format": DECK_FORMAT, "version": PARAMS_VERSION,
+                    "template": validate_params(plain_params(template))}
+        return json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+    # =========================
+    # Index
+    # =========================
+    def _write_index(self, offsets: array):
+        stat = self.path.stat()
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(_INDEX_HEADER.pack(_INDEX_MAGIC, stat.st_size, stat.st_mtime_ns))
+            offsets.tofile(f)
+        os.replace(tmp, self.index_path)
+
+    def _index_is_fresh(self) -> bool:
+        try:
+            with open(self.index_path, "rb") as f:
+                magic, size, mtime_ns = _INDEX_HEADER.unpack(f.read(_INDEX_HEADER.size))
+        except (OSError, struct.error):
+            return False
+        stat = self.path.stat()
+        return magic == _INDEX_MAGIC and size == stat.st_size and mtime_ns == stat.st_mtime_ns
+
+    def _rebuild_index(self):
+        # Simple repérage des fins de ligne : aucune carte n'est décodée
+        offsets = array("Q")
+        position = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                position += len(line)
+                if line.strip():
+                    offsets.append(position)
+        if not offsets:
+            raise ParamsError(f"{self.path.name} : deck vide")
+        self._write_index(offsets)
+
+    def _ensure_index(self):
+        if not self._index_is_fresh():
+            self._rebuild_index()
+
+    def _offsets(self) -> array:
+        self._ensure_index()
+        offsets = array("Q")
+        with open(self.index_path, "rb") as f:
+            f.seek(_INDEX_HEADER.size)
+            offsets.frombytes(f.read())
+        return offsets
+
+    def __len__(self) -> int:
+        self._ensure_index()
+        return (self.index_path.stat().st_size - _INDEX_HEADER.size) // 8 - 1
+
+    # =========================
+    # Lecture
+    # =========================
+    def _load_header(self):
+        with open(self.path, "rb") as f:
+            try:
+                document = json.loads(f.readline())
+            except ValueError as e:
+                raise ParamsError(f"{self.path.name} : en-tête JSON invalide ({e})") from e
+        if not isinstance(document, dict) or document.get("format") != DECK_FORMAT:
+            raise ParamsError(f"{self.path.name} : ce n'est pas un fichier {DECK_SUFFIX}")
+        if not isinstance(document.get("template"), dict):
+            raise ParamsError(f"{self.path.name} : modèle manquant")
+        self._version = document.get("version")
+        self._template = params_from_document(document["template"], self._version,
+                                              where=f"{self.path.name}, modèle : ")
+
+    @property
+    def template(self) -> dict:
+        """Paramètres complets communs à toutes les cartes (copie : la modifier ne change pas le deck)."""
+        if self._template is None:
+            self._load_header()
+        return merge_params(self._template, {})
+
+    def _parse_card(self, index: int, line: bytes) -> dict:
+        where = f"{self.path.name}, carte {index + 1} : "
+        try:
+            raw = json.loads(line)
+        except ValueError as e:
+            raise ParamsError(f"{where}JSON invalide ({e})") from e
+        if not isinstance(raw, dict):
+            raise ParamsError(f"{where}dictionnaire attendu")
+        if self._template is None:
+            self._load_header()
+        card = validate_params(normalize_card(migrate(raw, self._version)), partial=True, where=where)
+        restore_pairs(card)
+        photo_path = card.get("photo", {}).get("photo_path")
+        if photo_path and not Path(photo_path).is_absolute():
+            card["photo"]["photo_path"] = str(self.path.parent / photo_path)
+        return card
+
+    def card(self, index: int) -> dict:
+        """Surcharges de la carte index (à partir de 0) : seuls 16 octets de l'index et sa ligne sont lus."""
+        if index < 0:
+            index += len(self)
+        self._ensure_index()
+        chunk = b""
+        if index >= 0:
+            with open(self.index_path, "rb") as f:
+                f.seek(_INDEX_HEADER.size + 8 * index)
+                chunk = f.read(_OFFSET.size)
+        if len(chunk) < _OFFSET.size:
+            raise IndexError(f"{self.path.name} : pas de carte n°{index + 1}")
+        start, end = _OFFSET.unpack(chunk)
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return self._parse_card(index, f.read(end - start))
+
+    def card_params(self, index: int) -> dict:
+        """Paramètres complets de la carte index : modèle + surcharges."""
+        return merge_params(self.template, self.card(index))
+
+    def __iter__(self):
+        """Surcharges de toutes les cartes, dans l'ordre (lecture séquentielle, sans l'index)."""
+        with open(self.path, "rb") as f:
+            f.readline()
+            index = 0
+            for line in f:
+                if line.strip():
+                    yield self._parse_card(index, line)
+                    index += 1
+
+    # =========================
+    # Modification
+    # =========================
+    def append(self, card: dict) -> int:
+        """Ajoute une carte (delta ou paramètres complets) en fin de deck ; retourne son numéro."""
+        offsets = self._offsets()
+        line = _card_line(card_delta(self.template, card), self.path.resolve().parent)
+        with open(self.path, "ab") as f:
+            f.write(line)
+        offsets.append(offsets[-1] + len(line))
+        self._write_index(offsets)
+        return len(offsets) - 2
+
+    def replace(self, index: int, card: dict):
+        """Remplace la carte index (delta ou paramètres complets)."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"{self.path.name} : pas de carte n°{index + 1}")
+        self._splice(index + 1, _card_line(card_delta(self.template, card), self.path.resolve().parent))
+
+    def set_template(self, template: dict):
+        """
+        Remplace le modèle commun. Les lignes des cartes ne sont pas réécrites : leurs surcharges
+        s'appliquent désormais au nouveau modèle.
+        """
+        self._splice(0, self._header_line(template))
+        self._template = None
+
+    def _splice(self, line_number: int, data: bytes):
+        # Réécriture atomique du fichier avec la ligne line_number (0 = en-tête) remplacée par data
+        offsets = self._offsets()
+        offsets.insert(0, 0)
+        start, end = offsets[line_number], offsets[line_number + 1]
+        shift = len(data) - (end - start)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(self.path, "rb") as src, open(tmp, "wb") as dst:
+            dst.write(src.read(start))
+            dst.write(data)
+            src.seek(end)
+            while chunk := src.read(1 << 20):
+                dst.write(chunk)
+        os.replace(tmp, self.path)
+        self._write_index(array("Q", (o + shift if i > line_number else o
+                                      for i, o in enumerate(offsets) if i > 0)))
@@ -0,0 +1,201 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from PIL import Image
+
+from utils.app_paths import RENDER_CACHE_DIR
+
+
+class DiskCache:
+    """
+    Cache disque persistant, adressé par contenu : la clé est une empreinte des entrées du calcul
+    (paramètres, contenu des fichiers sources...), la valeur les octets du résultat.
+    Partagé par l'IHM et les exports, d'une session à l'autre.
+
+    Accès concurrent (threads et processus) : chaque écriture passe par un fichier temporaire renommé
+    avec os.replace, un lecteur voit donc l'entrée complète ou rien. Deux processus qui calculent la
+    même clé écrivent le même contenu : le dernier renommage l'emporte sans conséquence.
+
+    LRU : la date de modification d'une entrée est rafraîchie à chaque lecture. Quand le cache dépasse
+    max_bytes, les entrées les plus anciennes sont supprimées jusqu'à 90 % de max_bytes.
+    """
+    def __init__(self, directory, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._written = None   # octets écrits depuis le dernier passage d'éviction (None : jamais passé)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def configure(self, directory=None, max_bytes=None):
+        """Change le dossier et/ou la taille max (0 désactive le cache)."""
+        with self._lock:
+            if directory is not None:
+                self.directory = Path(directory)
+                self._written = None
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+
+    def config(self) -> tuple:
+        """(dossier, taille max), pour configurer le cache à l'identique dans un processus worker."""
+        return str(self.directory), self.max_bytes
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Empreinte des entrées du calcul (chaînes, nombres, tuples : tout ce dont repr() est stable)."""
+        return hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=20).hexdigest()
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.directory / key[:2] / f"{key}{suffix}"
+
+    # =========================
+    # Octets
+    # =========================
+    def get(self, key: str, suffix: str = ""):
+        if not self.enabled:
+            return None
+        self._account(0)
+        path = self._path(key, suffix)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            # Absente, ou supprimée entre-temps par l'éviction d'un autre processus
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes, suffix: str = ""):
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        path = self._path(key, suffix)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            # Cache en lecture seule ou disque plein : le calcul a eu lieu, on s'en passe
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        self._account(len(data))
+
+    def _account(self, written: int):
+        # Éviction au premier accès du processus, puis tous les 10 % de max_bytes écrits
+        with self._lock:
+            due = self._written is None or self._written + written > self.max_bytes // 10
+            self._written = 0 if due else self._written + written
+        if due:
+            self.evict()
+
+    # =========================
+    # Images décodées
+    # =========================
+    # Pixels bruts (en-tête "mode largeur hauteur\n") : relire une image de carte coûte quelques ms,
+    # là où décoder un PNG prend autant de temps que la recalculer.
+    def get_image(self, key: str):
+        data = self.get(key, ".raw")
+        if data is None:
+            return None
+        header, _, pixels = data.partition(b"\n")
+        try:
+            mode, width, height = header.decode("ascii").split()
+            return Image.frombytes(mode, (int(width), int(height)), pixels)
+        except ValueError:
+            return None
+
+    def put_image(self, key: str, img: Image.Image):
+        if self.enabled:
+            self.put(key, f"{img.mode} {img.width} {img.height}\n".encode("ascii") + img.tobytes(), ".raw")
+
+    # =========================
+    # Éviction
+    # =========================
+    def _entries(self) -> list:
+        entries = []
+        try:
+            subdirs = list(os.scandir(self.directory))
+        except OSError:
+            return entries
+        for subdir in subdirs:
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes, et les fichiers temporaires abandonnés."""
+        entries, tmp_files = [], []
+        for entry in self._entries():
+            (tmp_files if entry[2].endswith(".tmp") else entries).append(entry)
+
+        # Fichiers temporaires d'écritures interrompues, quel que soit leur rang dans l'ordre LRU
+        # (plus d'une heure : une écriture en cours n'est pas concernée)
+        stale = time.time() - 3600
+        for mtime, _, path in tmp_files:
+            if mtime <= stale:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 9 // 10
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Cache disque partagé par la prévisualisation et les exports (dossier et taille : voir configure)
+disk_cache = DiskCache(RENDER_CACHE_DIR)
@@ -0,0 +1,92 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+import io
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from PIL import ImageFont
+
+
+class FontCache:
+    """
+    Cache des polices ImageFont.truetype, clé (chemin, taille).
+
+    Le contenu des fichiers .ttf/.otf est gardé en mémoire : charger une nouvelle taille d'une police
+    déjà connue ne relit pas le disque. Le nombre de polices instanciées est limité à max_entries (LRU).
+    """
+    def __init__(self, max_entries: int = 64):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._fonts = OrderedDict()
+        self._font_bytes = {}
+        self._lock = threading.Lock()
+
+    def _read_font_file(self, path: str) -> bytes:
+        data = self._font_bytes.get(path)
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+            self._font_bytes[path] = data
+        return data
+
+    def get(self, path, size: int) -> ImageFont.FreeTypeFont:
+        """
+        Police `path` à la taille `size`. Lève OSError si le fichier est introuvable ou invalide.
+        """
+        key = (str(path), size)
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is not None:
+                self._fonts.move_to_end(key)
+                self.hits += 1
+                return font
+            self.misses += 1
+            try:
+                font = ImageFont.truetype(io.BytesIO(self._read_font_file(key[0])), size)
+            except FileNotFoundError:
+                # Nom de police système (ex: "arial.ttf") : laissé à la recherche de Pillow
+                font = ImageFont.truetype(key[0], size)
+            self._fonts[key] = font
+            if len(self._fonts) > self.max_entries:
+                self._fonts.popitem(last=False)
+            return font
+
+    def preload(self, paths):
+        """
+        Lit à l'avance les fichiers de police (ex: ceux trouvés par IHM_Gen_cards.list_fonts).
+        Les fichiers illisibles sont ignorés.
+        """
+        with self._lock:
+            for path in paths:
+                try:
+                    self._read_font_file(str(Path(path)))
+                except OSError:
+                    pass
+
+    def warm(self, fonts):
+        """Instancie à l'avance les couples (chemin, taille) donnés."""
+        for path, size in fonts:
+            try:
+                self.get(path, size)
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._fonts.clear()
+            self._font_bytes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._fonts),
+                "files": len(self._font_bytes),
+            }
+
+
+# Cache partagé par tous les rendus du processus
+font_cache = FontCache()
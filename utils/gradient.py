@@ -0,0 +1,21 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+from functools import lru_cache
+from PIL import Image
+
+
+@lru_cache(maxsize=8)
+def vertical_gradient(width: int, height: int, top: tuple, bottom: tuple) -> Image.Image:
+    """
+    Dégradé vertical RGB de la couleur `top` (haut) à `bottom` (bas).
+
+    Une seule colonne d'un pixel est calculée, puis étirée sur toute la largeur en une opération.
+    Le résultat est mis en cache par (largeur, hauteur, couleurs) : le copier avant de le modifier.
+    """
+    column = bytes(
+        int(c1 + (c2 - c1) * y / height)
+        for y in range(height)
+        for c1, c2 in zip(top, bottom)
+    )
+    return Image.frombytes("RGB", (1, height), column).resize((width, height), Image.NEAREST)
@@ -0,0 +1,192 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+from utils.disk_cache import disk_cache
+
+
+class ImageCache:
+    """
+    Cache LRU des images sources (fonds, photos) déjà décodées et redimensionnées.
+
+    Clé : (chemin, mtime, taille cible, mode de rééchantillonnage, keep_ratio, mode couleur).
+    La mémoire occupée est bornée par max_bytes ; les images les moins récemment utilisées sont évincées.
+    Les images retournées sont partagées : ne pas les modifier en place.
+    """
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _image_bytes(img: Image.Image) -> int:
+        return img.width * img.height * len(img.getbands())
+
+    def get_resized(self, path, size: tuple, resample=Image.LANCZOS, keep_ratio=False, mode=None,
+                    persist=False) -> Image.Image:
+        """
+        Retourne l'image `path` redimensionnée à `size`.
+
+        keep_ratio : l'image est mise à l'échelle pour tenir dans `size` en conservant ses proportions
+                     (la taille retournée peut donc être plus petite que `size`).
+        mode : conversion éventuelle ("RGBA"...) avant redimensionnement.
+        persist : passe aussi par le cache disque (disk_cache), pour les sessions suivantes et les autres processus.
+        """
+        key = (str(path), os.path.getmtime(path), tuple(size), resample, keep_ratio, mode)
+
+        with self._lock:
+            img = self._entries.get(key)
+            if img is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return img
+            self.misses += 1
+
+        if persist:
+            img = self._load_persistent(path, size, resample, keep_ratio, mode)
+        else:
+            img = self._load(path, size, resample, keep_ratio, mode)
+
+        with self._lock:
+            if key not in self._entries:
+                self._store(key, img)
+        return img
+
+    @staticmethod
+    def _load_persistent(path, size, resample, keep_ratio, mode) -> Image.Image:
+        """_load, en relisant si possible le résultat dans le cache disque (clé : contenu du fichier source)."""
+        if not disk_cache.enabled:
+            return ImageCache._load(path, size, resample, keep_ratio, mode)
+        key = disk_cache.key("resized", image_headers.digest(path), tuple(size), int(resample), keep_ratio, mode)
+        img = disk_cache.get_image(key)
+        if img is None:
+            img = ImageCache._load(path, size, resample, keep_ratio, mode)
+            disk_cache.put_image(key, img)
+        return img
+
+    @staticmethod
+    def _load(path, size, resample, keep_ratio, mode) -> Image.Image:
+        with Image.open(path) as src:
+            # JPEG : décodage directement à une résolution réduite quand la cible est plus petite
+            if src.format == "JPEG":
+                src.draft(None, tuple(size))
+            img = src.convert(mode) if mode and src.mode != mode else src
+
+            width, height = size
+            if keep_ratio:
+                scale = min(width / img.width, height / img.height)
+                width, height = max(1, int(img.width * scale)), max(1, int(img.height * scale))
+            if (width, height) != img.size:
+                return img.resize((width, height), resample)
+            return img.copy()
+
+    def _store(self, key, img: Image.Image):
+        img_bytes = self._image_bytes(img)
+        if img_bytes > self.max_bytes:
+            return
+        self._entries[key] = img
+        self._bytes += img_bytes
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= self._image_bytes(evicted)
+            self.evictions += 1
+
+    def set_max_bytes(self, max_bytes: int):
+        with self._lock:
+            self.max_bytes = max_bytes
+            while self._entries and self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._image_bytes(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+# Cache partagé par la prévisualisation et les exports d'un même processus
+image_cache = ImageCache()
+
+
+class ImageHeaderCache:
+    """
+    En-têtes des fichiers images (largeur, hauteur, mode) lus sans décoder les pixels,
+    et empreintes de leur contenu (pour dédoublonner les images identiques d'un PDF).
+
+    Clé : (chemin, mtime, taille du fichier) : seul un fichier modifié est relu.
+    """
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _entry(self, path, stat=None) -> dict:
+        stat = stat or os.stat(path)
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+            entry = self._entries[key] = {}
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return entry
+
+    def header(self, path, stat=None) -> tuple:
+        """
+        (largeur, hauteur, mode) de l'image. stat : résultat de os.stat / DirEntry.stat() s'il est déjà connu.
+        Lève OSError si le fichier n'est pas une image lisible.
+        """
+        entry = self._entry(path, stat)
+        if "header" not in entry:
+            with Image.open(path) as img:
+                entry["header"] = (img.width, img.height, img.mode)
+        return entry["header"]
+
+    def digest(self, path, stat=None) -> str:
+        """Empreinte du contenu du fichier."""
+        entry = self._entry(path, stat)
+        if "digest" not in entry:
+            with open(path, "rb") as f:
+                entry["digest"] = hashlib.file_digest(f, lambda: hashlib.blake2b(digest_size=16)).hexdigest()
+        return entry["digest"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+# En-têtes partagés par toutes les générations de PDF du processus
+image_headers = ImageHeaderCache()
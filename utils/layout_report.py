@@ -0,0 +1,62 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+import csv
+import json
+import time
+from pathlib import Path
+
+from utils.batch_renderer import card_file_name, merge_params
+from utils.card_renderer import CardRenderer
+
+
+# Colonnes du rapport, dans l'ordre
+REPORT_FIELDS = ("index", "file", "font_size_regular", "text_height", "text_max_height", "overflow_y", "overflow_x",
+                 "title_photo_overlap", "ok")
+
+
+def check_deck(base_params: dict, cards: list[dict], font_dirs=()) -> list[dict]:
+    """
+    Vérification de la mise en page de toutes les cartes d'un deck, sans rendu (métriques de police seulement).
+    Retourne une ligne de rapport par carte (voir REPORT_FIELDS).
+    """
+    renderer = CardRenderer(font_dirs=font_dirs)
+    rows = []
+    for index, card in enumerate(cards):
+        params = merge_params(base_params, card)
+        row = {"index": index + 1, "file": card_file_name(index, card, params)}
+        row.update(renderer.measure_card(params))
+        row["ok"] = not (row["overflow_y"] or row["overflow_x"] or row["title_photo_overlap"])
+        rows.append(row)
+    return rows
+
+
+def write_report(rows: list[dict], path):
+    """Écrit le rapport en CSV si le fichier a l'extension .csv, en JSON sinon."""
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, ensure_ascii=False, indent=2)
+
+
+def check_deck_to_report(base_params: dict, cards: list[dict], report_path, font_dirs=()) -> list[dict]:
+    """
+    check_deck puis écriture du rapport ; affiche les cartes en défaut et un résumé.
+    Retourne les lignes en défaut.
+    """
+    start = time.perf_counter()
+    rows = check_deck(base_params, cards, font_dirs=font_dirs)
+    write_report(rows, report_path)
+    elapsed = time.perf_counter() - start
+
+    failed = [row for row in rows if not row["ok"]]
+    for row in failed:
+        print(f"{row['file']} : débordement {row['overflow_y']} px (hauteur), {row['overflow_x']} px (largeur), "
+              f"chevauchement titre / cadre photo {row['title_photo_overlap']} px²")
+    print(f"{len(rows)} cartes vérifiées en {elapsed:.2f} s : {len(failed)} en défaut. Rapport : {report_path}")
+    return failed
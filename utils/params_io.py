@@ -0,0 +1,281 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+"""
+Format de sauvegarde des paramètres de carte : JSON versionné et validé par un schéma.
+
+    {"format": "card_creator.params", "version": 1, "params": {...}}
+
+Les anciens fichiers config/params.pkl (pickle, version 0) sont relus sans exécuter de code
+arbitraire (seuls les chemins pathlib sont acceptés) puis migrés vers la version courante.
+"""
+
+import copy
+import io
+import json
+import os
+import pickle
+from pathlib import Path, PurePath, PurePosixPath, PureWindowsPath
+
+from utils.app_paths import LEGACY_PARAMS_FILE, PARAMS_FILE
+from utils.card_renderer import default_card_params
+
+
+PARAMS_FORMAT = "card_creator.params"
+PARAMS_VERSION = 1
+
+
+class ParamsError(ValueError):
+    """Fichier de paramètres illisible, d'une version inconnue ou non conforme au schéma."""
+
+
+# =========================
+# Schéma
+# =========================
+def _is_int(v):
+    return isinstance(v, int) and not isinstance(v, bool)
+
+
+def _is_number(v):
+    return isinstance(v, (int, float)) and not isinstance(v, bool)
+
+
+def _is_pair(v):
+    return isinstance(v, (list, tuple)) and len(v) == 2 and _is_number(v[0]) and _is_number(v[1])
+
+
+def _is_color(v):
+    return isinstance(v, str) or (isinstance(v, (list, tuple)) and len(v) in (3, 4) and all(map(_is_int, v)))
+
+
+def _is_optional_color(v):
+    return v is None or _is_color(v)
+
+
+def _is_optional_path(v):
+    return v is None or isinstance(v, str)
+
+
+def _is_text_blocks(v):
+    return isinstance(v, list) and all(
+        isinstance(block, dict) and all(isinstance(s, str) for s in block.values()) for block in v)
+
+
+# (vérification, description du type attendu)
+INT = (_is_int, "un entier")
+BOOL = (lambda v: isinstance(v, bool), "un booléen")
+STR = (lambda v: isinstance(v, str), "une chaîne")
+PAIR = (_is_pair, "une paire de nombres")
+COLOR = (_is_color, "une couleur (nom, #RRGGBB ou liste RGB)")
+OPTIONAL_COLOR = (_is_optional_color, "une couleur ou null")
+OPTIONAL_PATH = (_is_optional_path, "un chemin ou null")
+TEXT_BLOCKS = (_is_text_blocks, "une liste de blocs {title, texte, comment}")
+
+# Clé -> type attendu, ou sous-schéma. Les clés absentes du schéma sont ignorées ;
+# les clés marquées optionnelles peuvent manquer même dans un jeu de paramètres complet.
+SCHEMA = {
+    "frame_dimensions": PAIR,
+    "card_bg_color": COLOR,
+    "card_outline_color": COLOR,
+    "card_outline_width": INT,
+    "title": {
+        "text": STR,
+        "font_size": INT,
+        "color": COLOR,
+        "title_position": PAIR,
+        "text_outline_color": OPTIONAL_COLOR,
+    },
+    "background": {
+        "background_path": OPTIONAL_PATH,
+        "display_background": BOOL,
+        "opacity": INT,
+        "keep_ratio": BOOL,
+    },
+    "photo": {
+        "frame_dimensions": PAIR,
+        "frame_position": PAIR,
+        "frame_bg_color": COLOR,
+        "background_opacity": INT,
+        "frame_rounded_radius": INT,
+        "frame_outline_color": COLOR,
+        "frame_outline_width": INT,
+        "photo_path": STR,
+    },
+    "text": {
+        "frame_dimensions": PAIR,
+        "frame_position": PAIR,
+        "font_size_regular": INT,
+        "font_size_bold": INT,
+        "font_size_italic": INT,
+        "text_color": COLOR,
+        "frame_rounded_radius": INT,
+        "padding": INT,
+        "frame_outline_color": COLOR,
+        "frame_outline_width": INT,
+        "font_regular": STR,
+        "font_bold": STR,
+        "font_italic": STR,
+        "frame_bg_color": COLOR,
+        "background_opacity": INT,
+        "fit_to_frame": BOOL,
+        "text_element": TEXT_BLOCKS,
+    },
+}
+OPTIONAL_KEYS = {("background", "opacity"), ("background", "keep_ratio")}
+
+
+def validate_params(params: dict, partial: bool = False, where: str = "") -> dict:
+    """
+    Vérifie params contre SCHEMA et lève ParamsError au premier écart (avec le chemin de la clé).
+    partial=True accepte un jeu incomplet (surcharges d'une carte de deck).
+    Retourne params pour pouvoir chaîner.
+    """
+    _validate(params, SCHEMA, (), partial, where)
+    return params
+
+
+def _validate(params, schema: dict, prefix: tuple, partial: bool, where: str):
+    if not isinstance(params, dict):
+        raise ParamsError(f"{where}{'.'.join(prefix) or 'params'} : dictionnaire attendu, reçu {params!r}")
+    for key, expected in schema.items():
+        keys = prefix + (key,)
+        if key not in params:
+            if not partial and keys not in OPTIONAL_KEYS:
+                raise ParamsError(f"{where}{'.'.join(keys)} : clé manquante")
+            continue
+        value = params[key]
+        if isinstance(expected, dict):
+            _validate(value, expected, keys, partial, where)
+        elif not expected[0](value):
+            raise ParamsError(f"{where}{'.'.join(keys)} : attendu {expected[1]}, reçu {value!r}")
+
+
+def restore_pairs(params: dict, schema: dict = SCHEMA):
+    """
+    JSON ne connaît pas les tuples : les paires et couleurs RGB redeviennent des tuples comme dans
+    default_card_params (Pillow n'accepte pas une liste comme couleur).
+    """
+    for key, expected in schema.items():
+        value = params.get(key)
+        if isinstance(expected, dict):
+            if isinstance(value, dict):
+                restore_pairs(value, expected)
+        elif expected in (PAIR, COLOR, OPTIONAL_COLOR) and isinstance(value, list):
+            params[key] = tuple(value)
+
+
+def _complete(params: dict, defaults: dict) -> dict:
+    """Ajoute les clés apparues depuis l'écriture du fichier (ex. text.fit_to_frame)."""
+    for key, value in defaults.items():
+        if key not in params:
+            params[key] = copy.deepcopy(value)
+        elif isinstance(value, dict) and isinstance(params[key], dict):
+            _complete(params[key], value)
+    return params
+
+
+# =========================
+# Migrations
+# =========================
+class _LegacyUnpickler(pickle.Unpickler):
+    """N'accepte que les chemins pathlib : un params.pkl ne contient rien d'autre que des types de base."""
+
+    def find_class(self, module, name):
+        if module.startswith("pathlib") and name.endswith("Path"):
+            # Un WindowsPath ne peut pas être instancié sous Linux (et inversement)
+            return PureWindowsPath if "Windows" in name else PurePosixPath
+        raise ParamsError(f"params.pkl : type non autorisé {module}.{name}")
+
+
+def plain_params(value):
+    """Chemins -> str, tuples -> listes : la représentation JSON des paramètres."""
+    if isinstance(value, dict):
+        return {key: plain_params(v) for key, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [plain_params(v) for v in value]
+    if isinstance(value, PurePath):
+        return str(value)
+    return value
+
+
+def _migrate_v0(params: dict) -> dict:
+    # Version 0 : dictionnaire pickle de l'IHM, avec des pathlib.Path. L'onglet Fond y rangeait
+    # aussi background["frame_dimensions"] = params["background"] (référence circulaire) : on l'écarte.
+    background = params.get("background")
+    if isinstance(background, dict) and isinstance(background.get("frame_dimensions"), dict):
+        del background["frame_dimensions"]
+    return plain_params(params)
+
+
+# version lue -> fonction produisant la version suivante
+MIGRATIONS = {0: _migrate_v0}
+
+
+def migrate(params: dict, version: int) -> dict:
+    """Applique les migrations successives de version jusqu'à PARAMS_VERSION."""
+    if not _is_int(version) or version > PARAMS_VERSION:
+        raise ParamsError(f"version de paramètres non prise en charge : {version!r} (max {PARAMS_VERSION})")
+    while version < PARAMS_VERSION:
+        params = MIGRATIONS[version](params)
+        version += 1
+    return params
+
+
+# =========================
+# Lecture / écriture
+# =========================
+def load_params(path) -> dict:
+    """
+    Charge un fichier de paramètres (JSON versionné, ancien pickle ou JSON brut de même structure),
+    le migre, le complète avec les valeurs par défaut et le valide.
+    """
+    path = Path(path)
+    data = path.read_bytes()
+    if data[:1] == b"\x80":
+        try:
+            params = _LegacyUnpickler(io.BytesIO(data)).load()
+        except ParamsError:
+            raise
+        except Exception as e:
+            raise ParamsError(f"{path} : pickle illisible ({e})") from e
+        version = 0
+    else:
+        try:
+            document = json.loads(data)
+        except ValueError as e:
+            raise ParamsError(f"{path} : JSON invalide ({e})") from e
+        if isinstance(document, dict) and document.get("format") == PARAMS_FORMAT:
+            params, version = document.get("params"), document.get("version")
+        else:
+            # JSON brut (dictionnaire de paramètres sans enveloppe), accepté par CardsBatchRenderer
+            params, version = document, PARAMS_VERSION
+    if not isinstance(params, dict):
+        raise ParamsError(f"{path} : dictionnaire de paramètres attendu")
+
+    return params_from_document(params, version, where=f"{path.name} : ")
+
+
+def params_from_document(params: dict, version: int, where: str = "") -> dict:
+    """Paramètres complets lus d'un document JSON : migration, valeurs par défaut, validation, tuples."""
+    params = _complete(migrate(params, version), default_card_params())
+    validate_params(params, where=where)
+    restore_pairs(params)
+    return params
+
+
+def save_params(params: dict, path):
+    """Valide puis écrit params au format JSON versionné (écriture atomique)."""
+    plain = validate_params(plain_params(params))
+    document = {"format": PARAMS_FORMAT, "version": PARAMS_VERSION, "params": plain}
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def default_params_path() -> Path:
+    """config/params.json, ou l'ancien config/params.pkl tant qu'il n'a pas été migré."""
+    if not PARAMS_FILE.exists() and LEGACY_PARAMS_FILE.exists():
+        return LEGACY_PARAMS_FILE
+    return PARAMS_FILE
@@ -1,44 +1,119 @@
+import hashlib
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
 from PIL import Image
-from tkinter import filedialog
+
+from utils.image_cache import image_headers
+
+
+class _JpegReader(ImageReader):
+    """
+    JPEG en mémoire, intégré tel quel dans le PDF (ni écriture sur disque, ni ré-encodage).
+
+    drawImage identifie une image par getRGBData() : ce sont ici les octets JPEG,
+    ce qui évite de décoder l'image uniquement pour calculer cette signature.
+    """
+    def __init__(self, data: bytes):
+        super().__init__(io.BytesIO(data))
+        self._jpeg_data = data
+        self._dataA = None
+
+    def getRGBData(self):
+        return self._jpeg_data
+
+
+# Extensions prises en compte dans image_dir (casse ignorée)
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png"}
 
 
 class PrintablePDFBuilder:
     def __init__(
         self,
-        image_dir: Path,
+        image_dir: Path = None,
         page_size=A4,
         printer_margin_mm: float = 10.0,
-        photo_width_mm: float = 60.0
+        photo_width_mm: float = 60.0,
+        jpeg_quality: int = 95,
+        copies_per_card: int = 1,
+        target_dpi: int = None,
+        prepare_workers: int = None,
+        layout: str = "grid",
+        allow_rotation: bool = True
     ):
-        self.image_dir = Path(image_dir)
+        """
+        image_dir : dossier des images à imprimer, pour generate_pdf. Optionnel avec write_pdf,
+                    qui reçoit directement les cartes (chemins, images PIL ou octets).
+        jpeg_quality : qualité d'encodage des images intégrées (images PIL, images rééchantillonnées).
+        copies_per_card : nombre d'exemplaires imprimés de chaque carte, placés à la suite.
+        target_dpi : résolution d'impression. Les images plus grandes que leur emplacement à cette résolution
+                     sont réduites avant d'être intégrées. None : images intégrées telles quelles.
+        prepare_workers : nombre de threads préparant les images (décodage, réduction, encodage) pendant
+                          l'écriture du PDF. None : nombre de coeurs, 4 au plus.
+        layout : "grid" (grille fixe, toutes les cartes à la taille de photo_width_mm) ou "packed" (cartes de
+                 tailles différentes, placées par étagères pour limiter le nombre de pages ; l'échelle
+                 pixels -> mm est donnée par la largeur de la première carte et photo_width_mm).
+        allow_rotation : en mode "packed", les cartes peuvent être tournées d'un quart de tour.
+        """
+        self.image_dir = Path(image_dir) if image_dir else None
         self.page_size = page_size
+        self.jpeg_quality = jpeg_quality
+        self.target_dpi = target_dpi or None
+        self.prepare_workers = prepare_workers or min(4, os.cpu_count() or 1)
+        self.copies_per_card = max(1, int(copies_per_card))
+        if layout not in ("grid", "packed"):
+            raise ValueError(f"Unknown layout: {layout}")
+        self.layout = layout
+        self.allow_rotation = allow_rotation
+        # Mode "packed" : taille d'un pixel en points, fixée par la première carte
+        self._points_per_pixel = None
 
         # Conversion mm → points
         self.printer_margin = printer_margin_mm * mm
         self.photo_width = photo_width_mm * mm
 
-        self.images = self._load_images()
-        if not self.images:
-            raise ValueError("No image found in directory")
+        self.images = []
+        self.photo_ratio = None
+        self.photo_height = None
+        if self.image_dir is not None:
+            self.images = self._load_images()
+            if not self.images:
+                raise ValueError("No image found in directory")
+            self._set_ratio(self._compute_ratio())
 
-        self.photo_ratio = self._compute_ratio()
+    def _set_ratio(self, ratio: float):
+        self.photo_ratio = ratio
         self.photo_height = self.photo_width / self.photo_ratio
 
-
     def _load_images(self):
-        return sorted(
-            list(self.image_dir.glob("*.jpg")) +
-            list(self.image_dir.glob("*.jpeg")) +
-            list(self.image_dir.glob("*.png"))
-        )
+        """
+        Images de image_dir, triées : un seul parcours du dossier (os.scandir), extensions sans tenir compte
+        de la casse. Seul l'en-tête de chaque image est lu (en cache tant que le fichier ne change pas) ;
+        les fichiers illisibles sont ignorés.
+        """
+        images = []
+        with os.scandir(self.image_dir) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS or not entry.is_file():
+                    continue
+                try:
+                    image_headers.header(entry.path, entry.stat())
+                except OSError as e:
+                    print(f"Image ignorée : {entry.name} ({e})")
+                    continue
+                images.append(Path(entry.path))
+        return sorted(images)
 
     def _compute_ratio(self):
-        with Image.open(self.images[0]) as img:
-            w, h = img.size
+        w, h = self._card_size(self.images[0])
         return w / h
 
 
@@ -58,41 +133,360 @@ class PrintablePDFBuilder:
 
         return cols, rows, photos_per_page
 
-    def generate_pdf(self):
-        save_path = filedialog.asksaveasfilename(
-            defaultextension=".pdf",
-            filetypes=[("PDF", "*.pdf")]
-        )
-        if not save_path:
-            return
+    @staticmethod
+    def _card_digest(card) -> str:
+        """
+        Empreinte du contenu d'une carte : deux cartes identiques (copies, fichiers en double)
+        ne sont intégrées qu'une fois dans le PDF.
+        """
+        if isinstance(card, (str, Path)):
+            return image_headers.digest(card)
+        if isinstance(card, (bytes, bytearray, memoryview)):
+            return hashlib.blake2b(card, digest_size=16).hexdigest()
+        digest = hashlib.blake2b(f"{card.mode}{card.size}".encode(), digest_size=16)
+        digest.update(card.tobytes())
+        return digest.hexdigest()
 
-        c = canvas.Canvas(save_path, pagesize=self.page_size)
+    @staticmethod
+    def _card_size(card) -> tuple:
+        """Taille en pixels d'une carte, lue dans l'en-tête pour les fichiers et les octets."""
+        if isinstance(card, (str, Path)):
+            return image_headers.header(card)[:2]
+        if isinstance(card, (bytes, bytearray, memoryview)):
+            with Image.open(io.BytesIO(card)) as img:
+                return img.size
+        return card.size
 
-        cols, rows, per_page = self._compute_layout()
+    def _slot_size(self, size: tuple) -> tuple:
+        """Taille en points de l'emplacement d'une image de `size` pixels."""
+        if self._points_per_pixel:
+            return size[0] * self._points_per_pixel, size[1] * self._points_per_pixel
+        return self.photo_width, self.photo_height
 
-        start_x = self.printer_margin
-        start_y = self.page_size[1] - self.printer_margin - self.photo_height
+    def _target_size(self, size: tuple):
+        """
+        Taille de l'image à intégrer pour target_dpi (emplacement en points / 72 * dpi, ratio conservé),
+        ou None si l'image n'a pas à être réduite.
+        """
+        if self.target_dpi is None:
+            return None
+        w, h = size
+        slot_w, slot_h = self._slot_size(size)
+        scale = min(slot_w / 72 * self.target_dpi / w, slot_h / 72 * self.target_dpi / h)
+        if scale >= 1:
+            return None
+        return max(1, round(w * scale)), max(1, round(h * scale))
 
-        for index, img_path in enumerate(self.images):
-            page_index = index % per_page
+    def _image_source(self, card):
+        """
+        Source à passer à drawImage et taille de l'image en pixels.
 
-            if page_index == 0 and index != 0:
-                c.showPage()
+        card : chemin d'image, image PIL, ou image encodée (bytes). Les fichiers et JPEG encodés qui n'ont pas
+        à être réduits sont transmis tels quels, les autres images sont encodées en JPEG en mémoire.
+        """
+        if isinstance(card, (str, Path)):
+            img = Image.open(card)
+        elif isinstance(card, (bytes, bytearray, memoryview)):
+            card = bytes(card)
+            img = Image.open(io.BytesIO(card))
+        else:
+            img = card
+
+        try:
+            target = self._target_size(img.size)
+            if target is None:
+                if isinstance(card, (str, Path)):
+                    return str(card), img.size
+                if isinstance(card, bytes) and img.format == "JPEG":
+                    reader = _JpegReader(card)
+                    return reader, reader.getSize()
+                data = self._encode_jpeg(img)
+            else:
+                # JPEG : décodage directement à une résolution réduite
+                if img is not card and img.format == "JPEG":
+                    img.draft(None, target)
+                data = self._encode_jpeg(img.resize(target, Image.LANCZOS))
+        finally:
+            if img is not card:
+                img.close()
+
+        reader = _JpegReader(data)
+        return reader, reader.getSize()
+
+    def _encode_jpeg(self, img: Image.Image) -> bytes:
+        buffer = io.BytesIO()
+        img.convert("RGB").save(buffer, "JPEG", quality=self.jpeg_quality)
+        return buffer.getvalue()
+
+    def _pack_pages(self, sizes: list) -> list:
+        """
+        Placement par étagères de cartes de tailles différentes (tailles en points).
+
+        Les cartes sont triées par hauteur décroissante (les cartes de même taille restent groupées), puis
+        chacune est placée sur la première étagère où elle tient (dans un sens ou l'autre si la rotation est
+        autorisée), sinon sur une nouvelle étagère, ouverte sur la première page qui a la hauteur nécessaire.
+        Le sens donné aux cartes qui ouvrent une étagère change beaucoup le résultat : avec la rotation,
+        plusieurs règles sont essayées et le placement qui donne le moins de pages est retenu.
+        Retourne les pages, chacune liste de (indice de la carte, x, y, largeur, hauteur, tournée).
+        """
+        page_width, page_height = self.page_size
+        usable_width = page_width - 2 * self.printer_margin
+        usable_height = page_height - 2 * self.printer_margin
+        eps = 1e-6
+
+        items = []
+        for index, (w, h) in enumerate(sizes):
+            options = [(w, h, False)]
+            if self.allow_rotation and w != h:
+                options.append((h, w, True))
+            options = [o for o in options if o[0] <= usable_width + eps and o[1] <= usable_height + eps]
+            if not options:
+                raise ValueError("Picture too big to be printed")
+            items.append((index, options))
+
+        def best_fill(options):
+            # Sens qui remplit le mieux la largeur de la page, puis le moins haut
+            return max(options, key=lambda o: ((usable_width + eps) // o[0] * o[0], -o[1]))
+
+        rules = [best_fill]
+        if self.allow_rotation:
+            rules += [lambda options: options[0], lambda options: options[-1]]
+
+        best = None
+        for rule in rules:
+            pages = self._pack_shelves(items, rule, usable_width, usable_height)
+            if best is None or len(pages) < len(best):
+                best = pages
+
+        # Coordonnées PDF : origine en bas à gauche, cartes alignées en haut de leur étagère
+        return [[(index, self.printer_margin + x, page_height - self.printer_margin - top - h, w, h, rotated)
+                 for index, x, top, w, h, rotated in page]
+                for page in best]
+
+    @staticmethod
+    def _pack_shelves(items: list, shelf_orientation, usable_width: float, usable_height: float) -> list:
+        """
+        Un placement par étagères (voir _pack_pages). shelf_orientation choisit le sens d'une carte qui ouvre
+        une nouvelle étagère. Retourne les pages, chacune liste de (indice, x, haut, largeur, hauteur, tournée)
+        avec x et haut relatifs au coin haut gauche de la zone imprimable.
+        """
+        eps = 1e-6
+        items = sorted(items, key=lambda item: -shelf_orientation(item[1])[1])
+
+        # Page : [hauteur utilisée, étagères [haut, hauteur, largeur utilisée], emplacements]
+        pages = []
+        for index, options in items:
+            preferred = shelf_orientation(options)
+            options = [preferred] + [o for o in options if o != preferred]
+            placed = False
+            for page in pages:
+                for shelf in page[1]:
+                    for w, h, rotated in options:
+                        if h <= shelf[1] + eps and shelf[2] + w <= usable_width + eps:
+                            page[2].append((index, shelf[2], shelf[0], w, h, rotated))
+                            shelf[2] += w
+                            placed = True
+                            break
+                    if placed:
+                        break
+                if placed:
+                    break
+            if placed:
+                continue
+
+            w, h, rotated = preferred
+            page = next((page for page in pages if page[0] + h <= usable_height + eps), None)
+            if page is None:
+                page = [0, [], []]
+                pages.append(page)
+            page[1].append([page[0], h, w])
+            page[2].append((index, 0, page[0], w, h, rotated))
+            page[0] += h
 
-            col = page_index % cols
-            row = page_index // cols
+        return [page[2] for page in pages]
 
-            x = start_x + col * self.photo_width
-            y = start_y - row * self.photo_height
+    def _prepared_cards(self, cards):
+        """
+        (empreinte, source pour drawImage) de chaque carte, dans l'ordre des cartes ; source vaut None pour
+        une image déjà rencontrée. Les images sont préparées par un pool de threads, au plus
+        2 * prepare_workers cartes en avance sur l'écriture : la mémoire reste bornée.
+        """
+        seen = set()
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.prepare_workers) as executor:
+            for card in cards:
+                # La réduction à target_dpi dépend de la hauteur des emplacements, donc du ratio des cartes
+                if self.photo_ratio is None:
+                    w, h = self._card_size(card)
+                    self._set_ratio(w / h)
 
+                digest = self._card_digest(card)
+                future = None
+                if digest not in seen:
+                    seen.add(digest)
+                    future = executor.submit(self._image_source, card)
+                pending.append((digest, future))
+
+                if len(pending) >= 2 * self.prepare_workers:
+                    digest, future = pending.popleft()
+                    yield digest, future and future.result()[0]
+
+            while pending:
+                digest, future = pending.popleft()
+                yield digest, future and future.result()[0]
+
+    def write_pdf(self, cards, output) -> dict:
+        """
+        Écrit le PDF à partir d'un itérable de cartes (chemins, images PIL ou octets), consommé au fur et
+        à mesure : les cartes sont préparées en parallèle (voir _prepared_cards) et placées dans leur ordre.
+        Sans image_dir, le ratio des cartes est celui de la première carte reçue.
+        Les images identiques (même contenu) ne sont intégrées qu'une fois et référencées à chaque emplacement.
+        En mode "packed", toutes les cartes sont reçues avant d'écrire la première page (voir _draw_packed).
+
+        output : chemin du fichier, ou flux binaire ouvert en écriture.
+        Retourne les statistiques {"pages", "cards", "images", "bytes", "elapsed"} (images : images distinctes ;
+        bytes : None pour un flux non positionnable).
+        """
+        start = time.perf_counter()
+        # Flux binaires : l'encodage ASCII85 de ReportLab (en Python pur) grossit les images de 25 %
+        # et représentait l'essentiel du temps d'écriture
+        use_a85, rl_config.useA85 = rl_config.useA85, 0
+        try:
+            return self._write_pdf(cards, output, start)
+        finally:
+            rl_config.useA85 = use_a85
+
+    def _write_pdf(self, cards, output, start) -> dict:
+        is_stream = hasattr(output, "write")
+        c = canvas.Canvas(output if is_stream else str(output), pagesize=self.page_size)
+        position = output.tell() if is_stream and output.seekable() else None
+
+        # Chaque image distincte devient un form XObject, dessiné à chaque emplacement où elle apparaît
+        forms = {}
+        if self.layout == "packed":
+            count, pages = self._draw_packed(c, cards, forms)
+        else:
+            count, pages = self._draw_grid(c, cards, forms)
+
+        # Écriture directe dans le fichier ou le flux : pas de copie supplémentaire du PDF sérialisé
+        c.save()
+        if not is_stream:
+            size = os.path.getsize(output)
+        elif position is not None:
+            size = output.tell() - position
+        else:
+            size = None
+
+        return {
+            "pages": pages,
+            "cards": count,
+            "images": len(forms),
+            "bytes": size,
+            "elapsed": time.perf_counter() - start,
+        }
+
+    @staticmethod
+    def _add_form(c, forms: dict, digest: str, image, width: float, height: float) -> str:
+        """Form XObject de l'image `digest` (créé à la première rencontre), de taille width x height points."""
+        form_name = forms.get(digest)
+        if form_name is None:
+            form_name = forms[digest] = f"card_{digest}"
+            c.beginForm(form_name, upperx=width, uppery=height)
             c.drawImage(
-                str(img_path),
-                x,
-                y,
-                width=self.photo_width,
-                height=self.photo_height,
+                image,
+                0,
+                0,
+                width=width,
+                height=height,
                 preserveAspectRatio=True,
                 anchor='c'
             )
+            c.endForm()
+        return form_name
 
-        c.save()
+    def _draw_grid(self, c, cards, forms: dict):
+        count = 0
+        per_page = 1
+        for digest, image in self._prepared_cards(cards):
+            if count == 0:
+                cols, rows, per_page = self._compute_layout()
+                start_x = self.printer_margin
+                start_y = self.page_size[1] - self.printer_margin - self.photo_height
+
+            form_name = self._add_form(c, forms, digest, image, self.photo_width, self.photo_height)
+
+            for _ in range(self.copies_per_card):
+                page_index = count % per_page
+
+                if page_index == 0 and count != 0:
+                    c.showPage()
+
+                col = page_index % cols
+                row = page_index // cols
+
+                c.saveState()
+                c.translate(start_x + col * self.photo_width, start_y - row * self.photo_height)
+                c.doForm(form_name)
+                c.restoreState()
+                count += 1
+
+        return count, max(1, -(-count // per_page))
+
+    def _draw_packed(self, c, cards, forms: dict):
+        """
+        Mode "packed" : les tailles de toutes les cartes (lues dans les en-têtes) sont nécessaires au placement,
+        et les pages les reprennent dans un autre ordre : les cartes sont donc toutes reçues (et gardées en
+        mémoire, pour des images encodées) avant l'écriture de la première page.
+        """
+        cards = list(cards)
+        if not cards:
+            return 0, 1
+        sizes = [self._card_size(card) for card in cards]
+        self._points_per_pixel = self.photo_width / sizes[0][0]
+
+        order = [index for index in range(len(cards)) for _ in range(self.copies_per_card)]
+        pages = self._pack_pages([self._slot_size(sizes[index]) for index in order])
+        prepared = self._prepared_cards(cards[order[slot[0]]] for page in pages for slot in page)
+
+        count = 0
+        for page_index, page in enumerate(pages):
+            if page_index:
+                c.showPage()
+            for (_, x, y, w, h, rotated), (digest, image) in zip(page, prepared):
+                card_w, card_h = (h, w) if rotated else (w, h)
+                form_name = self._add_form(c, forms, digest, image, card_w, card_h)
+
+                c.saveState()
+                if rotated:
+                    c.translate(x + w, y)
+                    c.rotate(90)
+                else:
+                    c.translate(x, y)
+                c.doForm(form_name)
+                c.restoreState()
+                count += 1
+
+        return count, len(pages)
+
+    def content_key(self, card_keys=None) -> str:
+        """
+        Empreinte du contenu des pages : réglages de mise en page et d'encodage, puis empreinte de chaque
+        carte dans l'ordre (par défaut celle des images de image_dir). Même empreinte, même PDF.
+        """
+        if card_keys is None:
+            card_keys = (self._card_digest(card) for card in self.images)
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr((tuple(self.page_size), self.printer_margin, self.photo_width, self.copies_per_card,
+                       self.target_dpi, self.jpeg_quality, self.layout, self.allow_rotation)).encode())
+        for key in card_keys:
+            h.update(f"\n{key}".encode())
+        return h.hexdigest()
+
+    def generate_pdf(self, output) -> dict:
+        """
+        PDF de toutes les images de image_dir, écrit dans output (chemin ou flux binaire).
+        Retourne les statistiques de write_pdf.
+        """
+        if self.image_dir is None:
+            raise ValueError("No image directory")
+        return self.write_pdf(self.images, output)
@@ -0,0 +1,24 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+import time
+
+
+class StartupTimer:
+    """
+    Jalons du démarrage de l'IHM, en ms depuis start (time.perf_counter() pris avant les imports lourds).
+
+        timer = StartupTimer(start)
+        timer.mark("imports")
+        ...
+        print(timer.report())
+    """
+    def __init__(self, start: float = None):
+        self.start = time.perf_counter() if start is None else start
+        self.marks = {}   # libellé -> ms ; seul le premier passage compte
+
+    def mark(self, label: str):
+        self.marks.setdefault(label, (time.perf_counter() - self.start) * 1000)
+
+    def report(self) -> str:
+        return "Démarrage : " + ", ".join(f"{label} {ms:.0f} ms" for label, ms in self.marks.items())
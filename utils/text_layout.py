@@ -0,0 +1,164 @@
+# Copyright (c) 2026 Le Gratiet Ronan
+# Licensed under the MIT License.
+
+import threading
+from collections import OrderedDict
+
+
+class TextLayoutEngine:
+    """
+    Mise en page des blocs de texte (text_element) d'une carte, sans dessiner.
+
+    - la largeur de chaque mot est mesurée une seule fois par police (cache (police, mot)) ;
+    - le retour à la ligne se fait en un seul passage sur les mots (somme des largeurs) ;
+    - chaque bloc mis en page est gardé en cache : modifier un bloc ne recalcule que celui-ci,
+      les blocs suivants sont seulement décalés verticalement.
+
+    Les polices sont passées sous la forme {"regular": font, "bold": font, "italic": font}
+    accompagnées d'une clé hashable qui les identifie (ex: chemins et tailles).
+    """
+    ROLES = ("regular", "bold", "italic")
+
+    def __init__(self, max_blocks: int = 512, max_words: int = 50000):
+        self.max_blocks = max_blocks
+        self.max_words = max_words
+        self._word_widths = {}
+        self._title_widths = {}
+        self._blocks = OrderedDict()
+        self._line_heights = {}
+        self._lock = threading.Lock()
+
+    def _word_width(self, font_key, font, word: str) -> float:
+        key = (font_key, word)
+        width = self._word_widths.get(key)
+        if width is None:
+            if len(self._word_widths) >= self.max_words:
+                self._word_widths.clear()
+            width = self._word_widths[key] = font.getlength(word)
+        return width
+
+    def _title_width(self, font_key, font, title: str) -> int:
+        """Largeur de la boîte englobante du titre (position du texte qui le suit sur la ligne)."""
+        key = (font_key, title)
+        width = self._title_widths.get(key)
+        if width is None:
+            if len(self._title_widths) >= self.max_words:
+                self._title_widths.clear()
+            bbox = font.getbbox(title)
+            width = self._title_widths[key] = bbox[2] - bbox[0]
+        return width
+
+    def line_height(self, fonts: dict, font_keys: tuple, line_spacing: int) -> int:
+        key = (font_keys, line_spacing)
+        height = self._line_heights.get(key)
+        if height is None:
+            height = max(fonts[role].getbbox("Hg")[3] - fonts[role].getbbox("Hg")[1] for role in self.ROLES)
+            height = self._line_heights[key] = height + line_spacing
+        return height
+
+    def _wrap(self, words: list, font_key, font, max_width: float) -> list:
+        """Découpe une liste de mots en lignes de largeur <= max_width (un mot trop long reste seul sur sa ligne)."""
+        space = self._word_width(font_key, font, " ")
+        lines = []
+        current, current_width = [], 0.0
+        for word in words:
+            width = self._word_width(font_key, font, word)
+            if current and current_width + space + width > max_width:
+                lines.append(" ".join(current))
+                current, current_width = [], 0.0
+            current_width += (space if current else 0) + width
+            current.append(word)
+        if current:
+            lines.append(" ".join(current))
+        return lines
+
+    def _layout_block(self, section: dict, fonts: dict, font_keys: tuple, max_width: float, line_height: int):
+        """
+        Retourne (lignes, hauteur) pour un bloc ; chaque ligne est (dx, dy, texte, rôle de police)
+        relative au coin haut gauche du bloc.
+        """
+        key_regular, key_bold, key_italic = font_keys
+        title = section.get("title", "")
+        texte = section.get("texte", "")
+        comment = section.get("comment", "")
+
+        lines = []
+        y = 0
+        words = texte.split() if texte else []
+
+        if title:
+            # Titre en gras puis début du texte sur la même ligne
+            title_width = self._title_width(key_bold, fonts["bold"], title)
+            space = self._word_width(key_regular, fonts["regular"], " ")
+            first, first_width = [], 0.0
+            for word in words:
+                width = (space if first else 0) + self._word_width(key_regular, fonts["regular"], word)
+                if title_width + first_width + width > max_width:
+                    break
+                first.append(word)
+                first_width += width
+
+            lines.append((0, y, title, "bold"))
+            if first:
+                lines.append((title_width, y, " ".join(first), "regular"))
+            y += line_height
+            words = words[len(first):]
+
+        for line in self._wrap(words, key_regular, fonts["regular"], max_width):
+            lines.append((0, y, line, "regular"))
+            y += line_height
+
+        if comment:
+            for line in self._wrap(comment.split(), key_italic, fonts["italic"], max_width):
+                lines.append((0, y, line, "italic"))
+                y += line_height
+
+        return lines, y
+
+    def layout_block(self, section: dict, fonts: dict, font_keys: tuple, max_width: float, line_height: int):
+        key = (section.get("title", ""), section.get("texte", ""), section.get("comment", ""),
+               font_keys, max_width, line_height)
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                return block
+            block = self._layout_block(section, fonts, font_keys, max_width, line_height)
+            self._blocks[key] = block
+            if len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+            return block
+
+    def max_line_width(self, lines: list, fonts: dict, font_keys: tuple) -> float:
+        """Largeur de la plus longue ligne (dx compris), calculée avec les largeurs de mots en cache."""
+        keys = dict(zip(self.ROLES, font_keys))
+        width = 0
+        for dx, _, text, role in lines:
+            words = text.split(" ")
+            space = self._word_width(keys[role], fonts[role], " ")
+            line_width = dx + space * (len(words) - 1)
+            line_width += sum(self._word_width(keys[role], fonts[role], word) for word in words)
+            width = max(width, line_width)
+        return width
+
+    def layout(self, text_elements: list, fonts: dict, font_keys: tuple, max_width: float,
+               line_spacing: int):
+        """
+        Met en page tous les blocs. Retourne (lignes, hauteur) avec des lignes (dx, dy, texte, rôle)
+        relatives au coin haut gauche de la zone de texte ; la hauteur va jusqu'au bas de la dernière ligne.
+        """
+        line_height = self.line_height(fonts, font_keys, line_spacing)
+        section_spacing = int(line_height * 1.5)
+
+        lines = []
+        y = height = 0
+        for section in text_elements:
+            block_lines, block_height = self.layout_block(section, fonts, font_keys, max_width, line_height)
+            lines.extend((dx, y + dy, text, role) for dx, dy, text, role in block_lines)
+            height = y + block_height
+            y = height + section_spacing - line_height
+        return lines, height
+
+
+# Moteur partagé par tous les rendus du processus
+text_layout = TextLayoutEngine()